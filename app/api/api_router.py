@@ -9,7 +9,16 @@ from app.api.v1.controllers.vexo_api_calls import (
     get_news_pro_subqueries, get_news_pro_claude,
     get_related_questions,
     get_searchpro_subqueries_response,
-    get_searchpro_claude_response
+    get_searchpro_claude_response,
+    get_model_stats,
+    get_embedding_cache_stats,
+    get_embedding_batcher_stats,
+    get_serp_cache_stats,
+    get_singleflight_stats,
+    get_breaker_stats,
+    get_serp_scheduler_stats,
+    get_plan_store_stats,
+    get_rank_executor_stats
 
 )
 from app.api.v1.models import SerpRequest, RelatedQuestionsResponse
@@ -106,3 +115,41 @@ async def news_pro_claude(request: SerpRequest = Body(...)) -> StreamingResponse
 async def vexo_related_questions(request: SerpRequest = Body(...)) -> JSONResponse:
     return await get_related_questions(request)
 
+
+##--------------------Admin Endpoints---------------------##
+
+@vexo_api_router.get("/admin/models")
+async def admin_models() -> JSONResponse:
+    return await get_model_stats()
+
+@vexo_api_router.get("/admin/embedding-cache")
+async def admin_embedding_cache() -> JSONResponse:
+    return await get_embedding_cache_stats()
+
+@vexo_api_router.get("/admin/embedding-batcher")
+async def admin_embedding_batcher() -> JSONResponse:
+    return await get_embedding_batcher_stats()
+
+@vexo_api_router.get("/admin/serp-cache")
+async def admin_serp_cache() -> JSONResponse:
+    return await get_serp_cache_stats()
+
+@vexo_api_router.get("/admin/singleflight")
+async def admin_singleflight() -> JSONResponse:
+    return await get_singleflight_stats()
+
+@vexo_api_router.get("/admin/breakers")
+async def admin_breakers() -> JSONResponse:
+    return await get_breaker_stats()
+
+@vexo_api_router.get("/admin/serp-scheduler")
+async def admin_serp_scheduler() -> JSONResponse:
+    return await get_serp_scheduler_stats()
+
+@vexo_api_router.get("/admin/plans")
+async def admin_plans() -> JSONResponse:
+    return await get_plan_store_stats()
+
+@vexo_api_router.get("/admin/rank-executor")
+async def admin_rank_executor() -> JSONResponse:
+    return await get_rank_executor_stats()
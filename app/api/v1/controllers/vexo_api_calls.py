@@ -1,7 +1,7 @@
 from fastapi import HTTPException
 from fastapi.responses import StreamingResponse, JSONResponse
 from app.api.v1.models import SerpRequest, SerpAPIResponseBody
-from app.api.v1.web_crawler.search import call_search_engines, fetch_google_scholar_results, process_and_rank_results, process_and_rank_scholar_results, format_scholar_results
+from app.api.v1.web_crawler.search import RANKING_STRATEGIES, call_search_engines, fetch_google_scholar_results, process_and_rank_results, process_and_rank_scholar_results, format_scholar_results
 from app.api.v1.core.llm import call_mistral_llm_stream, call_claude_llm_stream
 from app.api.v1.core.news import NewsSearchEngine, call_mistral_news_stream, call_claude_news_stream
 from app.api.v1.core.finance import FinanceSearchEngine, process_natural_language_input, call_mistral_finance_stream, call_claude_finance_stream
@@ -11,15 +11,30 @@ from app.api.v1.core.news_pro import NewsProSearch
 from app.api.v1.models import RelatedQuestionsResponse, RelatedQuestion
 from app.api.v1.core.relatedques import generate_related_questions
 from app.api.v1.core.websearch_pro import generate_queries_and_sections, vexoo_claude_pro_search
+from app.api.v1.core.model_registry import model_registry
+from app.api.v1.core.embedding_cache import embedding_cache
+from app.api.v1.core.embedding_batcher import embedding_batcher
+from app.api.v1.core.serp_cache import serp_cache
+from app.api.v1.core.singleflight import SingleFlight
+from app.api.v1.core.circuit_breaker import CircuitBreaker
+from app.api.v1.core.serpapi_client import serpapi_client
+from app.api.v1.core.serp_scheduler import serp_scheduler
+from app.api.v1.core.plan_store import plan_store
+from app.api.v1.core.rank_executor import rank_executor
 
 
 # Web Search
+def validate_ranking(args):
+    if args.ranking and args.ranking not in RANKING_STRATEGIES:
+        raise HTTPException(status_code=400, detail=f"Invalid input: ranking must be one of {', '.join(RANKING_STRATEGIES)}")
+
 async def get_mistral_response(request: SerpRequest) -> StreamingResponse:
     args = request.input
     if not args or not args.query:
         raise HTTPException(status_code=400, detail="Invalid input: query is required")
+    validate_ranking(args)
     try:
-        search_results = await call_search_engines(args.query)
+        search_results = await call_search_engines(args.query, args.ranking)
         async def generate():
             async for chunk in call_mistral_llm_stream(args.query, search_results):
                 yield chunk
@@ -31,8 +46,9 @@ async def get_claude_response(request: SerpRequest) -> StreamingResponse:
     args = request.input
     if not args or not args.query:
         raise HTTPException(status_code=400, detail="Invalid input: query is required")
+    validate_ranking(args)
     try:
-        search_results = await call_search_engines(args.query)
+        search_results = await call_search_engines(args.query, args.ranking)
         async def generate():
             async for chunk in call_claude_llm_stream(args.query, search_results):
                 yield chunk
@@ -44,7 +60,8 @@ async def get_search_evidence(request: SerpRequest) -> JSONResponse:
     args = request.input
     if args:
         question = args.query
-        results = await call_search_engines(question)
+        validate_ranking(args)
+        results = await call_search_engines(question, args.ranking)
         response_body = SerpAPIResponseBody(response=results)
         return JSONResponse(content={"success": True, "response": response_body.dict()})
     return JSONResponse(content={"success": False, "response": {}})
@@ -201,6 +218,11 @@ async def get_finance_evidence(request: SerpRequest) -> JSONResponse:
             return JSONResponse(content={"success": False, "error": str(e)})
     return JSONResponse(content={"success": False, "error": "Invalid input: query is required"})
 
+# Pro plans
+def load_plan(kind, args):
+    # None when no plan_id was sent or it expired, in which case the plan is recomputed
+    return plan_store.get(args.plan_id, kind, args.query) if args.plan_id else None
+
 # ScholarPro Search
 async def get_scholar_pro_subqueries(request: SerpRequest) -> JSONResponse:
     args = request.input
@@ -208,10 +230,11 @@ async def get_scholar_pro_subqueries(request: SerpRequest) -> JSONResponse:
         raise HTTPException(status_code=400, detail="Invalid input: query is required")
     try:
         scholar_pro_engine = ScholarProEngine()
-        result = await scholar_pro_engine.generate_research_areas_and_queries(args.query)
+        result, searches_saved = await scholar_pro_engine.generate_research_areas_and_queries(args.query)
         if result is None:
             raise HTTPException(status_code=500, detail="Failed to generate research areas and queries")
-        return JSONResponse(content={"success": True, "response": result})
+        plan_id = plan_store.put("scholarpro", args.query, result)
+        return JSONResponse(content={"success": True, "response": result, "plan_id": plan_id, "searches_saved": searches_saved})
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"An error occurred: {str(e)}")
 
@@ -221,8 +244,9 @@ async def get_scholar_pro_claude(request: SerpRequest) -> StreamingResponse:
         raise HTTPException(status_code=400, detail="Invalid input: query is required")
     try:
         scholar_pro_engine = ScholarProEngine()
+        research_areas = load_plan("scholarpro", args)
         async def generate():
-            async for chunk in scholar_pro_engine.vexoo_claude_scholar(args.query):
+            async for chunk in scholar_pro_engine.vexoo_claude_scholar(args.query, research_areas):
                 yield chunk
         return StreamingResponse(generate(), media_type="text/plain")
     except Exception as e:
@@ -238,7 +262,8 @@ async def get_news_pro_subqueries(request: SerpRequest) -> JSONResponse:
         sections = await news_pro.generate_research_areas_and_queries(args.query)
         if sections is None:
             raise HTTPException(status_code=500, detail="Failed to generate research areas and queries")
-        return JSONResponse(content={"success": True, "sections": sections})
+        plan_id = plan_store.put("newspro", args.query, sections)
+        return JSONResponse(content={"success": True, "sections": sections, "plan_id": plan_id})
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"An error occurred: {str(e)}")
 
@@ -248,7 +273,9 @@ async def get_news_pro_claude(request: SerpRequest) -> StreamingResponse:
         raise HTTPException(status_code=400, detail="Invalid input: query is required")
     try:
         news_pro = NewsProSearch()
-        sections = await news_pro.generate_research_areas_and_queries(args.query)
+        sections = load_plan("newspro", args)
+        if sections is None:
+            sections = await news_pro.generate_research_areas_and_queries(args.query)
         if sections is None:
             raise HTTPException(status_code=500, detail="Failed to generate research areas and queries")
         
@@ -283,8 +310,9 @@ async def get_searchpro_subqueries_response(request: SerpRequest) -> JSONRespons
         raise HTTPException(status_code=400, detail="Invalid input: query is required")
     
     try:
-        data = await generate_queries_and_sections(args.query)
-        return JSONResponse(content={"success": True, "response": data})
+        data, searches_saved = await generate_queries_and_sections(args.query)
+        plan_id = plan_store.put("searchpro", args.query, data)
+        return JSONResponse(content={"success": True, "response": data, "plan_id": plan_id, "searches_saved": searches_saved})
     except Exception as e:
         return JSONResponse(content={"success": False, "error": f"Error generating subqueries: {str(e)}"})
 
@@ -294,7 +322,9 @@ async def get_searchpro_claude_response(request: SerpRequest) -> StreamingRespon
         raise HTTPException(status_code=400, detail="Invalid input: query is required")
     
     try:
-        data = await generate_queries_and_sections(args.query)
+        data = load_plan("searchpro", args)
+        if data is None:
+            data, _ = await generate_queries_and_sections(args.query)
         
         async def generate():
             async for chunk in vexoo_claude_pro_search(args.query, data):
@@ -302,4 +332,32 @@ async def get_searchpro_claude_response(request: SerpRequest) -> StreamingRespon
         
         return StreamingResponse(generate(), media_type="text/plain")
     except Exception as e:
-        raise HTTPException(status_code=500, detail=f"An error occurred: {str(e)}")
\ No newline at end of file
+        raise HTTPException(status_code=500, detail=f"An error occurred: {str(e)}")
+
+# Admin
+async def get_model_stats() -> JSONResponse:
+    return JSONResponse(content={"success": True, "response": model_registry.report()})
+
+async def get_embedding_cache_stats() -> JSONResponse:
+    return JSONResponse(content={"success": True, "response": embedding_cache.stats()})
+
+async def get_embedding_batcher_stats() -> JSONResponse:
+    return JSONResponse(content={"success": True, "response": embedding_batcher.stats()})
+
+async def get_serp_cache_stats() -> JSONResponse:
+    return JSONResponse(content={"success": True, "response": serp_cache.stats()})
+
+async def get_singleflight_stats() -> JSONResponse:
+    return JSONResponse(content={"success": True, "response": SingleFlight.report()})
+
+async def get_breaker_stats() -> JSONResponse:
+    return JSONResponse(content={"success": True, "response": {"breakers": CircuitBreaker.report(), "serpapi": serpapi_client.stats()}})
+
+async def get_serp_scheduler_stats() -> JSONResponse:
+    return JSONResponse(content={"success": True, "response": serp_scheduler.stats()})
+
+async def get_plan_store_stats() -> JSONResponse:
+    return JSONResponse(content={"success": True, "response": plan_store.stats()})
+
+async def get_rank_executor_stats() -> JSONResponse:
+    return JSONResponse(content={"success": True, "response": rank_executor.stats()})
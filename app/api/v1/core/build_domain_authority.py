@@ -0,0 +1,83 @@
+import os
+import csv
+import math
+import argparse
+import numpy as np
+from app.api.v1.core.domain_authority import DOMAIN_AUTHORITY_INDEX, build_table, normalize_domain
+
+# Offline build of the domain authority index.
+#
+#   python -m app.api.v1.core.build_domain_authority --input top-1m.csv
+#
+# Takes headerless "rank,domain" rows (Tranco, Umbrella, Alexa) or a CSV whose header
+# names a domain column plus a score column or a rank column (Majestic's GlobalRank).
+# Ranks become log-scaled scores in (0, 1]; scores are used as given.
+
+DOMAIN_COLUMNS = ("domain", "host", "site")
+SCORE_COLUMNS = ("score", "authority")
+
+
+def rank_score(rank, total):
+    return 1 - math.log(rank) / math.log(total + 1)
+
+
+def read_rows(path):
+    # (domain, rank, score) per row, with exactly one of rank and score set
+    with open(path, newline="") as f:
+        reader = csv.reader(f)
+        first = next(reader, None)
+        if first is None:
+            return
+        if first[0].strip().isdigit():
+            for row in [first, *reader]:
+                if len(row) >= 2:
+                    yield row[1], int(row[0]), None
+            return
+
+        header = [name.strip().lower() for name in first]
+        domain_column = next((header.index(name) for name in DOMAIN_COLUMNS if name in header), None)
+        score_column = next((header.index(name) for name in SCORE_COLUMNS if name in header), None)
+        rank_column = next((i for i, name in enumerate(header) if "rank" in name), None)
+        if domain_column is None or (score_column is None and rank_column is None):
+            raise ValueError(f"{path} needs a domain column and a score or rank column, got {first}")
+        for row in reader:
+            if len(row) <= max(column for column in (domain_column, score_column, rank_column) if column is not None):
+                continue
+            if score_column is not None:
+                yield row[domain_column], None, float(row[score_column])
+            else:
+                yield row[domain_column], int(row[rank_column]), None
+
+
+def load_scores(path):
+    rows = list(read_rows(path))
+    total = max((rank for _, rank, _ in rows if rank is not None), default=0)
+    scores = {}
+    for domain, rank, score in rows:
+        domain = normalize_domain(domain)
+        if not domain:
+            continue
+        if score is None:
+            score = rank_score(rank, total)
+        # A domain listed twice (say with and without www.) keeps its best score
+        scores[domain] = max(score, scores.get(domain, score))
+    return scores
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--input", required=True, help="Top-sites CSV")
+    parser.add_argument("--output", default=DOMAIN_AUTHORITY_INDEX)
+    args = parser.parse_args()
+
+    scores = load_scores(args.input)
+    if not scores:
+        raise SystemExit(f"No domains found in {args.input}")
+    table = build_table(scores)
+    os.makedirs(os.path.dirname(args.output) or ".", exist_ok=True)
+    np.save(args.output, table)
+    print(f"Wrote {len(scores)} domains in {len(table)} slots to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,222 @@
+import os
+import time
+import asyncio
+import logging
+from collections import deque
+from dotenv import load_dotenv
+
+load_dotenv()
+
+# Failures and slow calls over the last BREAKER_WINDOW calls open the circuit
+BREAKER_WINDOW = int(os.getenv("BREAKER_WINDOW", "20"))
+BREAKER_MIN_CALLS = int(os.getenv("BREAKER_MIN_CALLS", "5"))
+BREAKER_FAILURE_RATE = float(os.getenv("BREAKER_FAILURE_RATE", "0.5"))
+BREAKER_OPEN_SECONDS = float(os.getenv("BREAKER_OPEN_SECONDS", "30"))
+BREAKER_HALF_OPEN_CALLS = int(os.getenv("BREAKER_HALF_OPEN_CALLS", "1"))
+
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half_open"
+
+
+class CircuitOpenError(Exception):
+    pass
+
+
+def http_ok(response):
+    # Throttling and server errors count against the upstream, client errors do not
+    return response.status < 500 and response.status != 429
+
+
+class CircuitBreaker:
+    breakers = {}
+
+    def __init__(self, name, slow_seconds):
+        self.name = name
+        self.slow_seconds = float(os.getenv(f"BREAKER_SLOW_SECONDS_{name.upper()}", slow_seconds))
+        self.state = CLOSED
+        self.window = deque(maxlen=BREAKER_WINDOW)
+        self.opened_at = None
+        self.probes = 0
+        self.probe_successes = 0
+        self.calls = 0
+        self.failures = 0
+        self.slow_calls = 0
+        self.rejected = 0
+        self.times_opened = 0
+        self.last_error = None
+        CircuitBreaker.breakers[name] = self
+
+    def reject_if_open(self):
+        # Side-effect free check, for callers that spend something (like quota) before calling
+        if self.state == OPEN and time.monotonic() - self.opened_at < BREAKER_OPEN_SECONDS:
+            self.rejected += 1
+            raise CircuitOpenError(f"{self.name} circuit is open")
+        # Half-open with every probe already out: before_call would reject it anyway
+        if self.state == HALF_OPEN and self.probes >= BREAKER_HALF_OPEN_CALLS:
+            self.rejected += 1
+            raise CircuitOpenError(f"{self.name} circuit is half-open")
+
+    def before_call(self):
+        # Raises CircuitOpenError, otherwise returns whether the call is a half-open probe
+        if self.state == OPEN:
+            if time.monotonic() - self.opened_at < BREAKER_OPEN_SECONDS:
+                self.rejected += 1
+                raise CircuitOpenError(f"{self.name} circuit is open")
+            self.state = HALF_OPEN
+            self.probes = 0
+            self.probe_successes = 0
+        if self.state == HALF_OPEN:
+            if self.probes >= BREAKER_HALF_OPEN_CALLS:
+                self.rejected += 1
+                raise CircuitOpenError(f"{self.name} circuit is half-open")
+            self.probes += 1
+            return True
+        return False
+
+    def record(self, probe, ok, latency, error=None):
+        self.calls += 1
+        failed = not ok or latency > self.slow_seconds
+        if not ok:
+            self.failures += 1
+            self.last_error = error
+        elif failed:
+            self.slow_calls += 1
+            self.last_error = f"slow call ({latency:.2f}s)"
+
+        if probe:
+            if self.state != HALF_OPEN:
+                return
+            if failed:
+                self._open()
+            else:
+                self.probe_successes += 1
+                if self.probe_successes >= BREAKER_HALF_OPEN_CALLS:
+                    self._close()
+            return
+
+        # Calls admitted before the circuit opened no longer count
+        if self.state != CLOSED:
+            return
+        self.window.append(failed)
+        if len(self.window) >= BREAKER_MIN_CALLS and self.failure_rate() >= BREAKER_FAILURE_RATE:
+            self._open()
+
+    def cancelled(self, probe, latency):
+        # A cancelled call only says something if it had already been slow
+        if latency > self.slow_seconds:
+            self.record(probe, True, latency)
+        elif probe and self.state == HALF_OPEN:
+            self.probes -= 1
+
+    def failure_rate(self):
+        return sum(self.window) / len(self.window) if self.window else 0.0
+
+    def _open(self):
+        self.state = OPEN
+        self.opened_at = time.monotonic()
+        self.times_opened += 1
+        self.window.clear()
+        logging.error(f"Circuit {self.name} opened: {self.last_error}")
+
+    def _close(self):
+        self.state = CLOSED
+        self.window.clear()
+        logging.info(f"Circuit {self.name} closed")
+
+    async def call(self, fn, *args, **kwargs):
+        probe = self.before_call()
+        start = time.monotonic()
+        try:
+            result = await fn(*args, **kwargs)
+        except asyncio.CancelledError:
+            self.cancelled(probe, time.monotonic() - start)
+            raise
+        except Exception as e:
+            self.record(probe, False, time.monotonic() - start, repr(e))
+            raise
+        self.record(probe, True, time.monotonic() - start)
+        return result
+
+    def guard(self, fn, *args, ok=None, **kwargs):
+        # fn returns a request context manager; it is only called once the circuit admits the call
+        return GuardedCall(self, lambda: fn(*args, **kwargs), ok)
+
+    def stats(self):
+        retry_in = None
+        if self.state == OPEN:
+            retry_in = round(max(0.0, BREAKER_OPEN_SECONDS - (time.monotonic() - self.opened_at)), 1)
+        return {
+            "state": self.state,
+            "failure_rate": round(self.failure_rate(), 4),
+            "window_calls": len(self.window),
+            "calls": self.calls,
+            "failures": self.failures,
+            "slow_calls": self.slow_calls,
+            "rejected": self.rejected,
+            "times_opened": self.times_opened,
+            "retry_in_seconds": retry_in,
+            "slow_seconds": self.slow_seconds,
+            "last_error": self.last_error,
+        }
+
+    @classmethod
+    def report(cls):
+        return {name: breaker.stats() for name, breaker in cls.breakers.items()}
+
+
+class GuardedCall:
+    # Wraps a request context manager, sync or async. The outcome is recorded once
+    # the response has started, so a long stream is not counted as a slow call.
+
+    def __init__(self, breaker, open_request, ok=None):
+        self.breaker = breaker
+        self.open_request = open_request
+        self.manager = None
+        self.ok = ok
+
+    def _start(self):
+        self.probe = self.breaker.before_call()
+        self.started = time.monotonic()
+        self.manager = self.open_request()
+
+    def _elapsed(self):
+        return time.monotonic() - self.started
+
+    def _opened(self, response):
+        if self.ok is None or self.ok(response):
+            self.breaker.record(self.probe, True, self._elapsed())
+        else:
+            self.breaker.record(self.probe, False, self._elapsed(), f"bad response {getattr(response, 'status', '')}".strip())
+        return response
+
+    async def __aenter__(self):
+        self._start()
+        try:
+            response = await self.manager.__aenter__()
+        except asyncio.CancelledError:
+            self.breaker.cancelled(self.probe, self._elapsed())
+            raise
+        except Exception as e:
+            self.breaker.record(self.probe, False, self._elapsed(), repr(e))
+            raise
+        return self._opened(response)
+
+    async def __aexit__(self, *exc_info):
+        return await self.manager.__aexit__(*exc_info)
+
+    def __enter__(self):
+        self._start()
+        try:
+            response = self.manager.__enter__()
+        except Exception as e:
+            self.breaker.record(self.probe, False, self._elapsed(), repr(e))
+            raise
+        return self._opened(response)
+
+    def __exit__(self, *exc_info):
+        return self.manager.__exit__(*exc_info)
+
+
+bedrock_breaker = CircuitBreaker("bedrock", slow_seconds=20)
+azure_mistral_breaker = CircuitBreaker("azure_mistral", slow_seconds=20)
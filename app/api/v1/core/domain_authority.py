@@ -0,0 +1,115 @@
+import os
+import time
+import hashlib
+import logging
+import numpy as np
+from dotenv import load_dotenv
+
+load_dotenv()
+
+DOMAIN_AUTHORITY_INDEX = os.getenv("DOMAIN_AUTHORITY_INDEX", "models/domain_authority.npy")
+# Score for domains missing from a loaded index
+DOMAIN_AUTHORITY_UNKNOWN = float(os.getenv("DOMAIN_AUTHORITY_UNKNOWN", "0"))
+
+# Open-addressing hash table with linear probing: 64-bit domain hash (0 marks an
+# empty slot) and score. Capacity is a power of two at most half full.
+INDEX_DTYPE = np.dtype([("key", "<u8"), ("score", "<f4")])
+
+# Pre-compute TLD scores
+TLD_SCORES = {
+    'com': 0.7, 'org': 0.6, 'net': 0.5, 'edu': 0.8, 'gov': 0.9,
+    'io': 0.4, 'co': 0.5, 'ai': 0.3, 'app': 0.3
+}
+
+
+def tld_authority(domain):
+    # Heuristic used when no index file has been built
+    tld = domain.split('.')[-1]
+    base_score = TLD_SCORES.get(tld, 0.3)
+    length_factor = max(0, (20 - len(domain)) / 20)
+    return min(1.0, base_score + (length_factor * 0.3))
+
+
+def normalize_domain(host):
+    host = host.strip().lower().rsplit('@', 1)[-1].split(':', 1)[0].rstrip('.')
+    return host[4:] if host.startswith('www.') else host
+
+
+def domain_key(domain):
+    # Stable across processes and runs, unlike hash()
+    key = int.from_bytes(hashlib.blake2b(domain.encode(), digest_size=8).digest(), "little")
+    return key or 1
+
+
+def build_table(scores):
+    # scores maps normalized domain -> score
+    capacity = 1 << max(4, (2 * len(scores) - 1).bit_length())
+    mask = capacity - 1
+    table = np.zeros(capacity, dtype=INDEX_DTYPE)
+    keys = table["key"]
+    for domain, score in scores.items():
+        key = domain_key(domain)
+        slot = key & mask
+        while keys[slot] and keys[slot] != key:
+            slot = (slot + 1) & mask
+        table[slot] = (key, score)
+    return table
+
+
+class DomainAuthorityIndex:
+    def __init__(self, path=DOMAIN_AUTHORITY_INDEX):
+        self.path = path
+        self.table = None
+        self.keys = None
+        self.scores = None
+        self.mask = 0
+        self.loaded = False
+
+    def load(self):
+        self.loaded = True
+        if not os.path.exists(self.path):
+            logging.warning(f"No domain authority index at {self.path}, using the TLD heuristic")
+            self.table = None
+            return
+        start = time.perf_counter()
+        # Memory-mapped, so startup only reads the header and lookups page in what they touch
+        table = np.load(self.path, mmap_mode="r")
+        capacity = len(table)
+        if table.dtype != INDEX_DTYPE or capacity & (capacity - 1):
+            logging.error(f"Ignoring domain authority index at {self.path}: unexpected layout")
+            self.table = None
+            return
+        self.table = table
+        self.keys = table["key"]
+        self.scores = table["score"]
+        self.mask = capacity - 1
+        logging.info(f"Loaded domain authority index {self.path} ({capacity} slots) in {(time.perf_counter() - start) * 1000:.1f} ms")
+
+    def lookup(self, domain):
+        key = domain_key(domain)
+        slot = key & self.mask
+        while True:
+            slot_key = int(self.keys[slot])
+            if slot_key == key:
+                return float(self.scores[slot])
+            if not slot_key:
+                return None
+            slot = (slot + 1) & self.mask
+
+    def score(self, host):
+        if not self.loaded:
+            self.load()
+        if self.table is None:
+            return tld_authority(host)
+        domain = normalize_domain(host)
+        # The host itself, then each parent down to two labels, so subdomains
+        # resolve to their registrable domain or whichever suffix is listed
+        labels = domain.split('.')
+        for i in range(max(1, len(labels) - 1)):
+            score = self.lookup('.'.join(labels[i:]))
+            if score is not None:
+                return score
+        return DOMAIN_AUTHORITY_UNKNOWN
+
+
+domain_authority_index = DomainAuthorityIndex()
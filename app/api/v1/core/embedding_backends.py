@@ -0,0 +1,182 @@
+import os
+import json
+import argparse
+import numpy as np
+from dotenv import load_dotenv
+
+load_dotenv()
+
+# "torch" runs sentence-transformers; "onnx" runs an exported, int8-quantized
+# ONNX Runtime graph and never imports torch.
+EMBEDDING_BACKEND = os.getenv("EMBEDDING_BACKEND", "torch")
+ONNX_MODEL_DIR = os.getenv("ONNX_MODEL_DIR", "models/onnx")
+ONNX_INTRA_OP_THREADS = int(os.getenv("ONNX_INTRA_OP_THREADS", "0"))
+EMBEDDING_MAX_LENGTH = int(os.getenv("EMBEDDING_MAX_LENGTH", "256"))
+
+
+def onnx_model_dir(model_name, root=ONNX_MODEL_DIR):
+    return os.path.join(root, model_name.replace("/", "__"))
+
+
+class SentenceTransformerBackend:
+    backend = "torch"
+
+    def __init__(self, model_name):
+        from sentence_transformers import SentenceTransformer
+        self.model = SentenceTransformer(model_name)
+
+    def encode(self, texts, normalize_embeddings=True, batch_size=32):
+        return self.model.encode(texts, normalize_embeddings=normalize_embeddings, batch_size=batch_size)
+
+
+class OnnxBackend:
+    backend = "onnx"
+
+    def __init__(self, model_name, model_dir=None, quantized=True):
+        try:
+            import onnxruntime as ort
+            from tokenizers import Tokenizer
+        except ImportError as e:
+            raise RuntimeError("EMBEDDING_BACKEND=onnx requires onnxruntime and tokenizers") from e
+
+        model_dir = model_dir or onnx_model_dir(model_name)
+        model_path = os.path.join(model_dir, "model-int8.onnx" if quantized else "model.onnx")
+        if not os.path.exists(model_path):
+            raise RuntimeError(f"No ONNX model at {model_path}; run python -m app.api.v1.core.embedding_backends export")
+
+        options = ort.SessionOptions()
+        if ONNX_INTRA_OP_THREADS:
+            options.intra_op_num_threads = ONNX_INTRA_OP_THREADS
+        self.session = ort.InferenceSession(model_path, options, providers=["CPUExecutionProvider"])
+        self.input_names = {i.name for i in self.session.get_inputs()}
+
+        self.tokenizer = Tokenizer.from_file(os.path.join(model_dir, "tokenizer.json"))
+        self.tokenizer.enable_truncation(max_length=EMBEDDING_MAX_LENGTH)
+        self.tokenizer.enable_padding()
+
+    def encode(self, texts, normalize_embeddings=True, batch_size=32):
+        if isinstance(texts, str):
+            return self.encode([texts], normalize_embeddings, batch_size)[0]
+        chunks = []
+        for start in range(0, len(texts), batch_size):
+            encodings = self.tokenizer.encode_batch(texts[start:start + batch_size])
+            input_ids = np.array([e.ids for e in encodings], dtype=np.int64)
+            attention_mask = np.array([e.attention_mask for e in encodings], dtype=np.int64)
+            feed = {"input_ids": input_ids, "attention_mask": attention_mask}
+            if "token_type_ids" in self.input_names:
+                feed["token_type_ids"] = np.array([e.type_ids for e in encodings], dtype=np.int64)
+
+            token_embeddings = self.session.run(None, feed)[0]
+            # Mean pooling over non-padding tokens, as sentence-transformers does for MiniLM
+            mask = attention_mask[..., None].astype(np.float32)
+            pooled = (token_embeddings * mask).sum(axis=1) / np.clip(mask.sum(axis=1), 1e-9, None)
+            chunks.append(pooled)
+
+        embeddings = np.vstack(chunks) if chunks else np.zeros((0, 0), dtype=np.float32)
+        if normalize_embeddings and len(embeddings):
+            embeddings /= np.clip(np.linalg.norm(embeddings, axis=1, keepdims=True), 1e-12, None)
+        return embeddings.astype(np.float32)
+
+
+BACKENDS = {
+    "torch": SentenceTransformerBackend,
+    "onnx": OnnxBackend,
+}
+
+
+def load_backend(model_name, backend=None):
+    backend = backend or EMBEDDING_BACKEND
+    if backend not in BACKENDS:
+        raise ValueError(f"Unknown EMBEDDING_BACKEND {backend!r}, expected one of {sorted(BACKENDS)}")
+    return BACKENDS[backend](model_name)
+
+
+def export_onnx(model_name, output_dir=None, opset=17):
+    import torch
+    from transformers import AutoModel, AutoTokenizer
+    from onnxruntime.quantization import quantize_dynamic, QuantType
+
+    output_dir = output_dir or onnx_model_dir(model_name)
+    os.makedirs(output_dir, exist_ok=True)
+    hf_name = model_name if "/" in model_name else f"sentence-transformers/{model_name}"
+
+    tokenizer = AutoTokenizer.from_pretrained(hf_name)
+    model = AutoModel.from_pretrained(hf_name).eval()
+    tokenizer.save_pretrained(output_dir)
+
+    sample = tokenizer(["export sample"], return_tensors="pt")
+    # Positional order of BertModel.forward
+    input_names = [name for name in ("input_ids", "attention_mask", "token_type_ids") if name in sample]
+    fp32_path = os.path.join(output_dir, "model.onnx")
+    dynamic_axes = {name: {0: "batch", 1: "sequence"} for name in input_names + ["last_hidden_state"]}
+    with torch.no_grad():
+        torch.onnx.export(
+            model,
+            tuple(sample[name] for name in input_names),
+            fp32_path,
+            input_names=input_names,
+            output_names=["last_hidden_state"],
+            dynamic_axes=dynamic_axes,
+            opset_version=opset,
+        )
+
+    int8_path = os.path.join(output_dir, "model-int8.onnx")
+    quantize_dynamic(fp32_path, int8_path, weight_type=QuantType.QInt8)
+    print(f"Exported {hf_name} -> {fp32_path}, {int8_path}")
+    return int8_path
+
+
+def verify_backend(model_name, texts, tolerance=0.02, backend="onnx"):
+    # Compare a backend's embeddings against the sentence-transformers reference
+    reference = SentenceTransformerBackend(model_name).encode(texts)
+    candidate = load_backend(model_name, backend).encode(texts)
+    cosines = np.sum(reference * candidate, axis=1)
+    report = {
+        "backend": backend,
+        "texts": len(texts),
+        "min_cosine": float(cosines.min()),
+        "mean_cosine": float(cosines.mean()),
+        "max_abs_diff": float(np.abs(reference - candidate).max()),
+        "tolerance": tolerance,
+    }
+    report["ok"] = report["min_cosine"] >= 1 - tolerance
+    return report
+
+
+def main():
+    from app.api.v1.core.model_registry import SENTENCE_MODEL_NAME
+
+    parser = argparse.ArgumentParser(description="Export and verify embedding backends")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    export_parser = subparsers.add_parser("export", help="Export the encoder to ONNX and quantize it to int8")
+    export_parser.add_argument("--model", default=SENTENCE_MODEL_NAME)
+    export_parser.add_argument("--output-dir")
+
+    verify_parser = subparsers.add_parser("verify", help="Check a backend against sentence-transformers")
+    verify_parser.add_argument("--model", default=SENTENCE_MODEL_NAME)
+    verify_parser.add_argument("--backend", default="onnx", choices=sorted(BACKENDS))
+    verify_parser.add_argument("--texts", help="File with one text per line")
+    verify_parser.add_argument("--tolerance", type=float, default=0.02)
+
+    args = parser.parse_args()
+    if args.command == "export":
+        export_onnx(args.model, args.output_dir)
+    else:
+        if args.texts:
+            with open(args.texts) as f:
+                texts = [line.strip() for line in f if line.strip()]
+        else:
+            texts = [
+                "Latest developments in renewable energy storage",
+                "Battery prices fell again this year as lithium supply expanded, analysts said.",
+                "How does a transformer model encode a sentence?",
+            ]
+        report = verify_backend(args.model, texts, args.tolerance, args.backend)
+        print(json.dumps(report, indent=2))
+        if not report["ok"]:
+            raise SystemExit(1)
+
+
+if __name__ == "__main__":
+    main()
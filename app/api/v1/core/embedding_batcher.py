@@ -0,0 +1,127 @@
+import os
+import time
+import queue
+import asyncio
+import logging
+import threading
+from concurrent.futures import Future
+from dotenv import load_dotenv
+from app.api.v1.core.model_registry import model_registry, SENTENCE_MODEL_NAME
+
+load_dotenv()
+
+EMBEDDING_BATCH_WINDOW_MS = float(os.getenv("EMBEDDING_BATCH_WINDOW_MS", "5"))
+EMBEDDING_BATCH_MAX_TEXTS = int(os.getenv("EMBEDDING_BATCH_MAX_TEXTS", "256"))
+
+
+def encode_normalized(model_name, texts):
+    return model_registry.get(model_name).encode(texts, normalize_embeddings=True)
+
+
+class EmbeddingBatcher:
+    # Coalesces encode requests from concurrent callers into one batch per window.
+    # Batches run on a dedicated worker thread, so neither the event loop nor the
+    # callers' threads pay the per-call overhead of the encoder.
+
+    def __init__(self, encode_fn=encode_normalized, window_ms=EMBEDDING_BATCH_WINDOW_MS, max_texts=EMBEDDING_BATCH_MAX_TEXTS):
+        self.encode_fn = encode_fn
+        self.window = window_ms / 1000
+        self.max_texts = max_texts
+        self.queue = queue.Queue()
+        self.thread = None
+        self._start_lock = threading.Lock()
+        self.batches = 0
+        self.requests = 0
+        self.texts = 0
+        self.largest_batch = 0
+
+    def start(self):
+        with self._start_lock:
+            if self.thread is None or not self.thread.is_alive():
+                self.thread = threading.Thread(target=self._run, name="embedding-batcher", daemon=True)
+                self.thread.start()
+
+    def stop(self):
+        if self.thread is not None and self.thread.is_alive():
+            self.queue.put(None)
+            self.thread.join()
+        self.thread = None
+
+    def submit(self, texts, model_name=SENTENCE_MODEL_NAME):
+        if self.thread is None:
+            self.start()
+        future = Future()
+        self.queue.put((model_name, list(texts), future))
+        return future
+
+    def encode(self, texts, model_name=SENTENCE_MODEL_NAME):
+        return self.submit(texts, model_name).result()
+
+    async def aencode(self, texts, model_name=SENTENCE_MODEL_NAME):
+        return await asyncio.wrap_future(self.submit(texts, model_name))
+
+    def _collect(self, first):
+        batch = [first]
+        size = len(first[1])
+        deadline = time.monotonic() + self.window
+        while size < self.max_texts:
+            timeout = deadline - time.monotonic()
+            if timeout <= 0:
+                break
+            try:
+                item = self.queue.get(timeout=timeout)
+            except queue.Empty:
+                break
+            if item is None:
+                self.queue.put(None)
+                break
+            batch.append(item)
+            size += len(item[1])
+        return batch
+
+    def _run(self):
+        while True:
+            first = self.queue.get()
+            if first is None:
+                return
+            batch = self._collect(first)
+
+            by_model = {}
+            for item in batch:
+                by_model.setdefault(item[0], []).append(item)
+
+            for model_name, items in by_model.items():
+                texts = [text for _, item_texts, _ in items for text in item_texts]
+                try:
+                    vectors = self.encode_fn(model_name, texts) if texts else []
+                except Exception as e:
+                    logging.error(f"Embedding batch of {len(texts)} texts failed: {e}")
+                    for _, _, future in items:
+                        future.set_exception(e)
+                    continue
+
+                offset = 0
+                for _, item_texts, future in items:
+                    future.set_result(vectors[offset:offset + len(item_texts)])
+                    offset += len(item_texts)
+
+                self.batches += 1
+                self.requests += len(items)
+                self.texts += len(texts)
+                self.largest_batch = max(self.largest_batch, len(texts))
+
+    def stats(self):
+        return {
+            "batches": self.batches,
+            "requests": self.requests,
+            "texts": self.texts,
+            "requests_per_batch": round(self.requests / self.batches, 2) if self.batches else 0.0,
+            "texts_per_batch": round(self.texts / self.batches, 2) if self.batches else 0.0,
+            "largest_batch": self.largest_batch,
+            "queued": self.queue.qsize(),
+            "window_ms": self.window * 1000,
+            "max_texts": self.max_texts,
+        }
+
+
+embedding_batcher = EmbeddingBatcher()
@@ -0,0 +1,242 @@
+import os
+import json
+import fcntl
+import hashlib
+import logging
+import threading
+import numpy as np
+from collections import OrderedDict
+from contextlib import contextmanager
+from dotenv import load_dotenv
+
+load_dotenv()
+
+EMBEDDING_CACHE_SIZE = int(os.getenv("EMBEDDING_CACHE_SIZE", "50000"))
+EMBEDDING_CACHE_DIR = os.getenv("EMBEDDING_CACHE_DIR")
+EMBEDDING_DISK_CAPACITY = int(os.getenv("EMBEDDING_DISK_CAPACITY", "200000"))
+
+KEY_BYTES = 20
+
+
+def embedding_key(model_name, text):
+    return hashlib.sha1(f"{model_name}\0{text}".encode("utf-8")).digest()
+
+
+class DiskEmbeddingStore:
+    # Ring buffer of float16 vectors in a memory-mapped file, indexed by sha1 key.
+    # Rows survive restarts; once capacity is reached the oldest rows are overwritten.
+    # Several processes (uvicorn workers, rank pool processes) can share a directory:
+    # writes hold a file lock and the running write count lives in the directory, so
+    # each process only has to catch its own key -> row index up with it.
+
+    def __init__(self, directory, capacity=EMBEDDING_DISK_CAPACITY):
+        self.directory = directory
+        self.capacity = capacity
+        self.meta_path = os.path.join(directory, "meta.json")
+        self.position_path = os.path.join(directory, "position.bin")
+        self.vectors = None
+        self.keys = None
+        self.position = None
+        self.index = {}
+        self.row_keys = {}
+        self.synced = 0
+        self.dim = None
+        self.writes_since_flush = 0
+        self.lock_file = None
+        self.lock_pid = None
+        os.makedirs(directory, exist_ok=True)
+        with self._locked():
+            if os.path.exists(self.meta_path):
+                self._load()
+        self._sync()
+
+    @contextmanager
+    def _locked(self):
+        # flock is shared across fork, so a forked child opens its own lock file
+        if self.lock_pid != os.getpid():
+            self.lock_file = open(os.path.join(self.directory, "lock"), "a+")
+            self.lock_pid = os.getpid()
+        fcntl.flock(self.lock_file, fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            fcntl.flock(self.lock_file, fcntl.LOCK_UN)
+
+    def _load(self):
+        with open(self.meta_path) as f:
+            meta = json.load(f)
+        self.capacity = meta["capacity"]
+        # Directories written before the count moved out of meta.json carry next_row and count
+        count = meta.get("count", 0)
+        written = count if count < self.capacity else self.capacity + meta.get("next_row", 0)
+        self._open(meta["dim"], mode="r+", written=written)
+
+    def _create(self, dim):
+        self._open(dim, mode="w+")
+        with open(self.meta_path, "w") as f:
+            json.dump({"dim": dim, "capacity": self.capacity}, f)
+
+    def _open(self, dim, mode, written=0):
+        self.dim = dim
+        self.vectors = np.memmap(os.path.join(self.directory, "vectors.f16"), dtype=np.float16,
+                                 mode=mode, shape=(self.capacity, dim))
+        self.keys = np.memmap(os.path.join(self.directory, "keys.bin"), dtype=np.uint8,
+                              mode=mode, shape=(self.capacity, KEY_BYTES))
+        if mode == "r+" and os.path.exists(self.position_path):
+            self.position = np.memmap(self.position_path, dtype=np.int64, mode="r+", shape=(1,))
+        else:
+            self.position = np.memmap(self.position_path, dtype=np.int64, mode="w+", shape=(1,))
+            self.position[0] = written
+
+    @property
+    def written(self):
+        # Rows ever written by any process; the next one goes to written % capacity
+        return int(self.position[0]) if self.position is not None else 0
+
+    @property
+    def count(self):
+        return min(self.written, self.capacity)
+
+    def _sync(self):
+        # Index the rows written (by any process) since this one last looked
+        if self.vectors is None:
+            if not os.path.exists(self.meta_path):
+                return
+            with self._locked():
+                self._load()
+        written = self.written
+        if written == self.synced:
+            return
+        for total in range(max(self.synced, written - self.capacity), written):
+            row = total % self.capacity
+            old_key = self.row_keys.get(row)
+            if old_key is not None and self.index.get(old_key) == row:
+                del self.index[old_key]
+            key = self.keys[row].tobytes()
+            self.index[key] = row
+            self.row_keys[row] = key
+        self.synced = written
+
+    def get(self, key):
+        row = self.index.get(key)
+        if row is None:
+            self._sync()
+            row = self.index.get(key)
+            if row is None:
+                return None
+        vector = np.asarray(self.vectors[row], dtype=np.float32)
+        # Checked after the read: a writer clears the key before replacing the vector
+        if self.keys[row].tobytes() != key:
+            self.index.pop(key, None)
+            return None
+        return vector
+
+    def put(self, key, vector):
+        if key in self.index:
+            return
+        with self._locked():
+            if self.vectors is None:
+                if os.path.exists(self.meta_path):
+                    self._load()
+                else:
+                    self._create(len(vector))
+            self._sync()
+            if key in self.index:
+                return
+            written = self.written
+            row = written % self.capacity
+            self.keys[row] = 0
+            self.vectors[row] = vector
+            self.keys[row] = np.frombuffer(key, dtype=np.uint8)
+            self.position[0] = written + 1
+            self._sync()
+        self.writes_since_flush += 1
+        if self.writes_since_flush >= 1000:
+            self.flush()
+
+    def flush(self):
+        if self.vectors is None:
+            return
+        self.vectors.flush()
+        self.keys.flush()
+        self.position.flush()
+        self.writes_since_flush = 0
+
+
+class EmbeddingCache:
+    def __init__(self, max_size=EMBEDDING_CACHE_SIZE, disk_dir=EMBEDDING_CACHE_DIR):
+        self.max_size = max_size
+        self.memory = OrderedDict()
+        self.disk = None
+        self.disk_dir = disk_dir
+        self.hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._lock = threading.Lock()
+
+    def _disk(self):
+        if self.disk is None and self.disk_dir:
+            try:
+                self.disk = DiskEmbeddingStore(self.disk_dir)
+            except (OSError, ValueError, KeyError) as e:
+                logging.error(f"Disabling on-disk embedding cache at {self.disk_dir}: {e}")
+                self.disk_dir = None
+        return self.disk
+
+    def _remember(self, key, vector):
+        self.memory[key] = vector
+        self.memory.move_to_end(key)
+        while len(self.memory) > self.max_size:
+            self.memory.popitem(last=False)
+            self.evictions += 1
+
+    def get_many(self, model_name, texts):
+        vectors = []
+        with self._lock:
+            disk = self._disk()
+            for text in texts:
+                key = embedding_key(model_name, text)
+                vector = self.memory.get(key)
+                if vector is not None:
+                    self.memory.move_to_end(key)
+                    self.hits += 1
+                elif disk is not None and (vector := disk.get(key)) is not None:
+                    self._remember(key, vector)
+                    self.hits += 1
+                    self.disk_hits += 1
+                else:
+                    self.misses += 1
+                vectors.append(vector)
+        return vectors
+
+    def put_many(self, model_name, texts, vectors):
+        with self._lock:
+            disk = self._disk()
+            for text, vector in zip(texts, vectors):
+                key = embedding_key(model_name, text)
+                vector = np.asarray(vector, dtype=np.float32)
+                self._remember(key, vector)
+                if disk is not None:
+                    disk.put(key, vector)
+
+    def stats(self):
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "disk_hits": self.disk_hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+            "memory_entries": len(self.memory),
+            "memory_capacity": self.max_size,
+            "disk_entries": self.disk.count if self.disk else 0,
+        }
+
+    def close(self):
+        with self._lock:
+            if self.disk is not None:
+                self.disk.flush()
+
+
+embedding_cache = EmbeddingCache()
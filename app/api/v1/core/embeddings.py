@@ -0,0 +1,59 @@
+import numpy as np
+from app.api.v1.core.model_registry import SENTENCE_MODEL_NAME
+from app.api.v1.core.embedding_cache import embedding_cache
+from app.api.v1.core.embedding_batcher import embedding_batcher
+from app.api.v1.core.embedding_backends import EMBEDDING_BACKEND
+
+
+def _cache_name(model_name):
+    # Quantized backends drift slightly from torch, so they do not share cache entries
+    return f"{model_name}:{EMBEDDING_BACKEND}"
+
+
+def _lookup(texts, model_name):
+    vectors = embedding_cache.get_many(_cache_name(model_name), texts)
+    missing = list(dict.fromkeys(text for text, vector in zip(texts, vectors) if vector is None))
+    return vectors, missing
+
+
+def _merge(texts, vectors, missing, encoded, model_name):
+    if missing:
+        embedding_cache.put_many(_cache_name(model_name), missing, encoded)
+        encoded_by_text = dict(zip(missing, encoded))
+        vectors = [encoded_by_text[text] if vector is None else vector for text, vector in zip(texts, vectors)]
+    return np.vstack(vectors).astype(np.float32)
+
+
+def embed_texts(texts, model_name=SENTENCE_MODEL_NAME):
+    # Normalized embeddings for texts, encoding only what the cache does not already hold
+    vectors, missing = _lookup(texts, model_name)
+    encoded = embedding_batcher.encode(missing, model_name) if missing else []
+    return _merge(texts, vectors, missing, encoded, model_name)
+
+
+async def aembed_texts(texts, model_name=SENTENCE_MODEL_NAME):
+    vectors, missing = _lookup(texts, model_name)
+    encoded = await embedding_batcher.aencode(missing, model_name) if missing else []
+    return _merge(texts, vectors, missing, encoded, model_name)
+
+
+def _similarity_texts(query, results):
+    titles = [result.get('title', '') for result in results]
+    snippets = [result.get('snippet', '') for result in results]
+    return [query] + titles + snippets, len(titles)
+
+
+def _split_similarities(embeddings, n):
+    similarities = embeddings[1:] @ embeddings[0]
+    return similarities[n:], similarities[:n]
+
+
+def compute_semantic_similarities(query, results, model_name=SENTENCE_MODEL_NAME):
+    # One batched pass for the query, all titles and all snippets
+    texts, n = _similarity_texts(query, results)
+    return _split_similarities(embed_texts(texts, model_name), n)
+
+
+async def acompute_semantic_similarities(query, results, model_name=SENTENCE_MODEL_NAME):
+    texts, n = _similarity_texts(query, results)
+    return _split_similarities(await aembed_texts(texts, model_name), n)
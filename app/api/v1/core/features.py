@@ -0,0 +1,113 @@
+import os
+import re
+import numpy as np
+from datetime import datetime
+from functools import lru_cache
+from dotenv import load_dotenv
+from app.api.v1.core.domain_authority import domain_authority_index
+
+load_dotenv()
+
+DOMAIN_SCORE_CACHE_SIZE = int(os.getenv("DOMAIN_SCORE_CACHE_SIZE", "50000"))
+
+# Tried in order; the first match that parses with one of DATE_FORMATS wins
+DATE_PATTERNS = [
+    re.compile(r'\b(\d{1,2}\s+(?:Jan|Feb|Mar|Apr|May|Jun|Jul|Aug|Sep|Oct|Nov|Dec)\s+\d{4})\b'),
+    re.compile(r'\b(\d{4}-\d{2}-\d{2})\b'),
+]
+DATE_FORMATS = ('%d %b %Y', '%Y-%m-%d')
+# Both patterns contain a four digit year, so text without one skips them
+YEAR_HINT = re.compile(r'\d{4}')
+
+# Same netloc as urlparse: everything between '//' and the first '/', '?' or '#'
+URL_HOST = re.compile(r'^(?:[A-Za-z][A-Za-z0-9+.\-]*:)?//([^/?#]*)')
+
+# Columns of content_features, in order
+CONTENT_FEATURES = [
+    "snippet_length",
+    "query_count",
+    "semantic_similarity_snippet",
+    "semantic_similarity_title",
+    "domain_authority",
+    "content_freshness",
+]
+
+
+@lru_cache(maxsize=DOMAIN_SCORE_CACHE_SIZE)
+def domain_authority_score(domain):
+    return domain_authority_index.score(domain)
+
+
+def url_host(url):
+    match = URL_HOST.match(url)
+    return match.group(1) if match else ''
+
+
+@lru_cache(maxsize=4096)
+def _parse_date(text):
+    for date_format in DATE_FORMATS:
+        try:
+            return datetime.strptime(text, date_format)
+        except ValueError:
+            continue
+    return None
+
+
+def get_content_freshness(result, now=None):
+    current_time = now or datetime.now()
+    date_str = result.get('date') or result.get('snippet', '')
+
+    for pattern in DATE_PATTERNS if YEAR_HINT.search(date_str) else ():
+        match = pattern.search(date_str)
+        if match:
+            date = _parse_date(match.group(1))
+            if date is None:
+                continue
+            days_old = (current_time - date).days
+            return max(0, 1 - (days_old / 365))
+
+    position = result.get('position', 0)
+    return max(0, 1 - (position / 20))
+
+
+def content_features(query, results, snippet_similarities, title_similarities):
+    # One (len(results), len(CONTENT_FEATURES)) matrix for the whole batch
+    snippets = [result.get('snippet', '') for result in results]
+    now = datetime.now()
+    n = len(results)
+    X = np.empty((n, len(CONTENT_FEATURES)))
+    X[:, 0] = np.fromiter((len(snippet) for snippet in snippets), dtype=np.float64, count=n)
+    X[:, 1] = np.fromiter((snippet.count(query) for snippet in snippets), dtype=np.float64, count=n)
+    X[:, 2] = snippet_similarities
+    X[:, 3] = title_similarities
+    X[:, 4] = np.fromiter((domain_authority_score(url_host(result.get('link', ''))) for result in results), dtype=np.float64, count=n)
+    X[:, 5] = np.fromiter((get_content_freshness(result, now) for result in results), dtype=np.float64, count=n)
+    return X
+
+
+def engine_rank_matrix(results, engines):
+    # Reciprocal rank per engine, 0 where the engine did not return the page
+    X = np.zeros((len(results), len(engines)))
+    column = {engine: j for j, engine in enumerate(engines)}
+    for i, result in enumerate(results):
+        for engine, position in result.get('positions', {}).items():
+            if engine in column:
+                X[i, column[engine]] = 1 / position
+    return X
+
+
+def web_feature_matrix(results, content, engines):
+    # Learned web layout: engine ranks, content features, then how many engines returned the page
+    engine_count = np.fromiter((len(result['positions']) for result in results), dtype=np.float64, count=len(results))
+    return np.hstack([engine_rank_matrix(results, engines), content, engine_count[:, None]])
+
+
+def minmax_columns(X):
+    # Column-wise min-max to [0, 1], constant columns to 0, as MinMaxScaler does
+    X = np.asarray(X, dtype=np.float64)
+    if X.size == 0:
+        return X
+    low = X.min(axis=0)
+    span = X.max(axis=0) - low
+    span[span == 0] = 1
+    return (X - low) / span
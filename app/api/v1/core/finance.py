@@ -8,23 +8,15 @@ import certifi
 from dateutil import parser
 from statistics import mean, median
 from dotenv import load_dotenv
-from serpapi import GoogleSearch
 from anthropic import AnthropicBedrock
+from app.api.v1.core.serpapi_client import serpapi_client
+from app.api.v1.core.circuit_breaker import bedrock_breaker, azure_mistral_breaker, http_ok
 
 load_dotenv()
 
 class FinanceSearchEngine:
-    def __init__(self):
-        self.api_key = os.getenv("serpapi_api_key")
-
     async def fetch_finance_results(self, ticker):
-        params = {
-            "engine": "google_finance",
-            "q": ticker,
-            "api_key": self.api_key
-        }
-        search = GoogleSearch(params)
-        results = search.get_dict()
+        results = await serpapi_client.search_engine("google_finance", ticker)
         return self.format_finance_results(results, ticker)
 
     def format_finance_results(self, search_data, ticker):
@@ -201,7 +193,7 @@ async def call_mistral_finance_stream(query, search_results, finance_search_engi
             ssl_context.verify_mode = ssl.CERT_NONE
 
         async with aiohttp.ClientSession() as session:
-            async with session.post(url, json=data, headers=headers, ssl=ssl_context) as resp:
+            async with azure_mistral_breaker.guard(session.post, url, json=data, headers=headers, ssl=ssl_context, ok=http_ok) as resp:
                 if resp.status != 200:
                     error_msg = await resp.text()
                     raise Exception(f"API request failed with status {resp.status}: {error_msg}")
@@ -261,7 +253,7 @@ async def call_claude_finance_stream(query, search_results, finance_search_engin
 
         If specific data is missing, use your knowledge to make reasonable approximations and provide a general market analysis. Ensure your response is thorough, insightful, and actionable, while clearly stating any limitations or assumptions in your analysis."""
 
-        with client.messages.stream(
+        with bedrock_breaker.guard(client.messages.stream,
             max_tokens=2046,
             messages=[
                 {
@@ -0,0 +1,106 @@
+import json
+from app.api.v1.core.circuit_breaker import bedrock_breaker
+
+
+class StreamingJSONParser:
+    # Incremental parser for the first JSON object in a streamed LLM response.
+    # feed() returns (path, value) for every value that completed in the chunk,
+    # innermost first: ("area", 0) for the first question of "area", ("area",) once
+    # its list closes and () for the whole object. Text before the object is skipped.
+
+    def __init__(self):
+        self.stack = []
+        self.keys = []
+        self.in_string = False
+        self.escape = False
+        self.buffer = []
+        self.scalar = []
+        self.root = None
+        self.done = False
+
+    def feed(self, text):
+        events = []
+        for ch in text:
+            if self.done:
+                break
+            if self.in_string:
+                if self.escape:
+                    self.escape = False
+                elif ch == '\\':
+                    self.escape = True
+                elif ch == '"':
+                    self.in_string = False
+                    self._string(json.loads('"' + ''.join(self.buffer) + '"'), events)
+                    continue
+                self.buffer.append(ch)
+                continue
+
+            if not self.stack:
+                if ch == '{':
+                    self._open({})
+                continue
+
+            if self.scalar and ch in ',]} \t\r\n':
+                self._value(json.loads(''.join(self.scalar)), events)
+                self.scalar = []
+
+            if ch == '"':
+                self.in_string = True
+                self.buffer = []
+            elif ch in '{[':
+                self._open({} if ch == '{' else [])
+            elif ch in '}]':
+                self._close(events)
+            elif ch not in ',: \t\r\n':
+                self.scalar.append(ch)
+        return events
+
+    def _path(self):
+        # Key or index of the child being built at each open level
+        return tuple(
+            key if isinstance(container, dict) else len(container)
+            for container, key in zip(self.stack, self.keys)
+        )
+
+    def _open(self, container):
+        self.stack.append(container)
+        self.keys.append(None)
+
+    def _close(self, events):
+        container = self.stack.pop()
+        self.keys.pop()
+        if self.stack:
+            self._value(container, events)
+        else:
+            self.root = container
+            self.done = True
+            events.append(((), container))
+
+    def _string(self, value, events):
+        if isinstance(self.stack[-1], dict) and self.keys[-1] is None:
+            self.keys[-1] = value
+        else:
+            self._value(value, events)
+
+    def _value(self, value, events):
+        path = self._path()
+        container = self.stack[-1]
+        if isinstance(container, dict):
+            container[self.keys[-1]] = value
+            self.keys[-1] = None
+        else:
+            container.append(value)
+        events.append((path, value))
+
+
+async def stream_json_events(client, **kwargs):
+    # Streams a Claude response and yields parser events as soon as each value closes.
+    # Generation is cut off once the JSON object is complete.
+    parser = StreamingJSONParser()
+    async with bedrock_breaker.guard(client.messages.stream, **kwargs) as stream:
+        async for text in stream.text_stream:
+            for event in parser.feed(text):
+                yield event
+            if parser.done:
+                return
+    raise ValueError("No complete JSON object in the response")
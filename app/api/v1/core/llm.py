@@ -4,6 +4,7 @@ from dotenv import load_dotenv
 from mistralai.async_client import MistralAsyncClient
 from mistralai.models.chat_completion import ChatMessage
 from anthropic import AsyncAnthropicBedrock
+from app.api.v1.core.circuit_breaker import bedrock_breaker, azure_mistral_breaker, http_ok
 import aiohttp
 import ssl
 import certifi
@@ -65,7 +66,7 @@ async def call_mistral_llm_stream(query, search_results):
             ssl_context.verify_mode = ssl.CERT_NONE
 
         async with aiohttp.ClientSession() as session:
-            async with session.post(url, json=data, headers=headers, ssl=ssl_context) as resp:
+            async with azure_mistral_breaker.guard(session.post, url, json=data, headers=headers, ssl=ssl_context, ok=http_ok) as resp:
                 if resp.status != 200:
                     error_msg = await resp.text()
                     raise Exception(f"API request failed with status {resp.status}: {error_msg}")
@@ -100,7 +101,7 @@ async def call_claude_llm_stream(query, search_results):
 
         Based on these search results and your extensive knowledge, provide an exceptionally detailed, comprehensive, and insightful response to the query. Your answer should be characterized by its depth, precision, and attention to nuanced details. Ensure your response is directly relevant, incorporates the latest information, and is tailored to the specific nature and depth of the question. If the query is coding-related, include detailed code examples with explanations. Anticipate and address potential follow-up questions in your response. Remember to include a detailed "Sources" section at the end of your response, with numbered references and URLs for further reading."""
 
-        async with anthropic_client.messages.stream(
+        async with bedrock_breaker.guard(anthropic_client.messages.stream,
             max_tokens=2046,
             messages=[
                 {
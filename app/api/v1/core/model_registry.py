@@ -0,0 +1,76 @@
+import os
+import time
+import logging
+import resource
+import threading
+from dotenv import load_dotenv
+from app.api.v1.core.embedding_backends import load_backend
+
+load_dotenv()
+
+SENTENCE_MODEL_NAME = os.getenv("SENTENCE_MODEL_NAME", "all-MiniLM-L6-v2")
+
+
+def current_rss_bytes():
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, IndexError):
+        # ru_maxrss is the peak, in kilobytes on Linux
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024
+
+
+class ModelRegistry:
+    def __init__(self):
+        self.models = {}
+        self.loaders = {}
+        self.stats = {}
+        self._lock = threading.Lock()
+
+    def register(self, name, loader):
+        self.loaders[name] = loader
+
+    def get(self, name=SENTENCE_MODEL_NAME):
+        model = self.models.get(name)
+        if model is None:
+            with self._lock:
+                model = self.models.get(name)
+                if model is None:
+                    model = self._load(name)
+        return model
+
+    def _load(self, name):
+        loader = self.loaders.get(name, load_backend)
+        rss_before = current_rss_bytes()
+        start = time.perf_counter()
+        model = loader(name)
+        load_seconds = time.perf_counter() - start
+        rss_after = current_rss_bytes()
+
+        self.models[name] = model
+        self.stats[name] = {
+            "backend": getattr(model, "backend", type(model).__name__),
+            "load_seconds": round(load_seconds, 3),
+            "rss_delta_bytes": rss_after - rss_before,
+            "loaded_at": time.time(),
+        }
+        logging.info(f"Loaded model {name} in {load_seconds:.2f}s (+{(rss_after - rss_before) / 2**20:.1f} MiB RSS)")
+        return model
+
+    def preload(self, names):
+        for name in names:
+            self.get(name)
+
+    def clear(self):
+        with self._lock:
+            self.models.clear()
+            self.stats.clear()
+
+    def report(self):
+        return {
+            "rss_bytes": current_rss_bytes(),
+            "models": dict(self.stats),
+        }
+
+
+model_registry = ModelRegistry()
@@ -0,0 +1,103 @@
+import os
+import re
+import hashlib
+import logging
+import numpy as np
+from functools import lru_cache
+from dotenv import load_dotenv
+
+load_dotenv()
+
+# Estimated Jaccard similarity of word-bigram shingles at which two results are one story.
+# Syndicated copies with a different headline or truncation score around 0.7-0.9,
+# different articles on the same topic stay well under 0.2.
+NEAR_DUP_THRESHOLD = float(os.getenv("NEAR_DUP_THRESHOLD", "0.5"))
+MINHASH_PERMUTATIONS = 64
+
+TOKEN = re.compile(r"\w+")
+# Universal hashing (a * h + b) mod p over 32-bit shingle hashes; fits in uint64 since a, h < 2**32
+MERSENNE_PRIME = np.uint64((1 << 61) - 1)
+_rng = np.random.default_rng(0)
+PERMUTATION_A = _rng.integers(1, 1 << 32, MINHASH_PERMUTATIONS, dtype=np.uint64)
+PERMUTATION_B = _rng.integers(0, 1 << 32, MINHASH_PERMUTATIONS, dtype=np.uint64)
+
+
+@lru_cache(maxsize=65536)
+def _shingle_hash(shingle):
+    return int.from_bytes(hashlib.blake2b(shingle.encode(), digest_size=4).digest(), "little")
+
+
+def result_text(result):
+    return f"{result.get('title', '')} {result.get('snippet', '')}"
+
+
+def shingles(text):
+    words = TOKEN.findall(text.lower())
+    if len(words) < 2:
+        return words
+    return [f"{a} {b}" for a, b in zip(words, words[1:])]
+
+
+def minhash(text):
+    # MINHASH_PERMUTATIONS minimums, or None when there are no words to compare
+    text_shingles = set(shingles(text))
+    if not text_shingles:
+        return None
+    hashes = np.fromiter((_shingle_hash(shingle) for shingle in text_shingles), dtype=np.uint64, count=len(text_shingles))
+    return ((hashes[:, None] * PERMUTATION_A + PERMUTATION_B) % MERSENNE_PRIME).min(axis=0)
+
+
+def estimated_jaccard(signature, signatures):
+    # Against one signature or a stack of them
+    return np.mean(signatures == signature, axis=-1)
+
+
+def collapse_near_duplicates(results, threshold=NEAR_DUP_THRESHOLD):
+    # Keeps the first (best ranked) result of each near-duplicate cluster; the links (or
+    # source names, for formatted results without one) of the ones dropped are recorded
+    # on it as alternate_sources. Returns the kept results and the tokens removed.
+    kept = []
+    # Signatures of kept results that have words, and where those results sit in kept
+    signatures = np.empty((0, MINHASH_PERMUTATIONS), dtype=np.uint64)
+    signature_slots = []
+    copied = set()
+    removed_tokens = 0
+    for result in results:
+        signature = minhash(result_text(result))
+        match = None
+        if signature is not None and signature_slots:
+            similar = np.flatnonzero(estimated_jaccard(signature, signatures) >= threshold)
+            if similar.size:
+                match = signature_slots[similar[0]]
+        if match is None:
+            if signature is not None:
+                signatures = np.vstack([signatures, signature])
+                signature_slots.append(len(kept))
+            kept.append(result)
+            continue
+
+        removed_tokens += len(TOKEN.findall(result_text(result)))
+        # The same page often turns up twice (overlapping questions), so skip the
+        # kept result's own link or source and anything already listed
+        own = (kept[match].get('link'), kept[match].get('source'))
+        listed = kept[match].get('alternate_sources', [])
+        alternates = [
+            alternate
+            for alternate in dict.fromkeys([result.get('link') or result.get('source'), *result.get('alternate_sources', [])])
+            if alternate and alternate not in own and alternate not in listed
+        ]
+        if not alternates:
+            continue
+        if match not in copied:
+            # Copy so cached or shared result dicts are never modified
+            kept[match] = {**kept[match], 'alternate_sources': list(listed)}
+            copied.add(match)
+        kept[match]['alternate_sources'].extend(alternates)
+
+    return kept, removed_tokens
+
+
+def log_removed_tokens(label, removed_tokens):
+    # Once per request, with the total over every collapse it ran
+    if removed_tokens:
+        logging.info(f"Near-duplicate collapse ({label}): removed ~{removed_tokens} tokens")
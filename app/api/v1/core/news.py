@@ -1,22 +1,26 @@
 import os
 import json
-import asyncio
 import numpy as np
-from functools import lru_cache
 from dotenv import load_dotenv
 from aiohttp import ClientSession, TCPConnector
-from sklearn.metrics.pairwise import cosine_similarity
-from sklearn.preprocessing import MinMaxScaler
-from lightgbm import LGBMRanker
-from sentence_transformers import SentenceTransformer
-from serpapi import GoogleSearch
 import aiohttp
 import ssl
 import certifi
 from anthropic import AsyncAnthropicBedrock
+from app.api.v1.core.ranker import ranker
+from app.api.v1.core.serpapi_client import serpapi_client
+from app.api.v1.core.serp_cache import normalize_query
+from app.api.v1.core.singleflight import SingleFlight
+from app.api.v1.core.embeddings import compute_semantic_similarities
+from app.api.v1.core.rank_executor import rank_executor
+from app.api.v1.core.features import minmax_columns
+from app.api.v1.core.near_dup import collapse_near_duplicates, log_removed_tokens
+from app.api.v1.core.circuit_breaker import bedrock_breaker, azure_mistral_breaker, http_ok
 
 load_dotenv()
 
+news_rank_flights = SingleFlight("news_rank")
+
 # Load environment variables
 SERPAPI_API_KEY = os.getenv('serpapi_api_key')
 AWS_ACCESS_KEY_ID = os.getenv("AWS_ACCESS_KEY_ID")
@@ -31,25 +35,8 @@ anthropic_client = AsyncAnthropicBedrock(
 
 
 class NewsSearchEngine:
-    def __init__(self):
-        self.sentence_model = SentenceTransformer('all-MiniLM-L6-v2')
-    
-    @lru_cache(maxsize=1000)
-    def get_news_embedding(self, text):
-        return self.sentence_model.encode(text)
-    
     async def fetch_news_results(self, query, num_results=10):
-        serpapi_api_key = os.getenv('serpapi_api_key')
-        
-        params = {
-            "api_key": serpapi_api_key,
-            "engine": "google_news",
-            "q": query,
-            "num": num_results
-        }
-        
-        search = GoogleSearch(params)
-        results = search.get_dict()
+        results = await serpapi_client.search_engine("google_news", query, num=num_results)
         return results.get("news_results", [])
     
     def format_news_results(self, search_data):
@@ -66,50 +53,29 @@ class NewsSearchEngine:
         return formatted_results
     
     async def rank_news_results(self, results, query):
-        query_embedding = await asyncio.to_thread(self.get_news_embedding, query)
-        
-        features = []
-        for i, result in enumerate(results):
-            title = result.get('title', '')
-            snippet = result.get('snippet', '')
-            
-            title_embedding = await asyncio.to_thread(self.get_news_embedding, title)
-            snippet_embedding = await asyncio.to_thread(self.get_news_embedding, snippet)
-            
-            semantic_similarity_title = cosine_similarity([query_embedding], [title_embedding])[0][0]
-            semantic_similarity_snippet = cosine_similarity([query_embedding], [snippet_embedding])[0][0]
-            
-            features.append([
-                i,
-                semantic_similarity_snippet,
-                semantic_similarity_title
-            ])
-        
-        X = np.array(features)
-        X = MinMaxScaler().fit_transform(X)
-        
-        y = np.arange(len(features))[::-1]
-        y = MinMaxScaler().fit_transform(y.reshape(-1, 1)).ravel()
-        y = (y * 20).astype(int)
-        
-        group = [len(features)]
+        key = (normalize_query(query), tuple(result.get('link', '') for result in results))
+        return await news_rank_flights.do(key, self._rank_news_results, results, query)
+
+    async def _rank_news_results(self, results, query):
+        ranked_results, removed_tokens = await rank_executor.run(self._rank_news_features, results, query)
+        log_removed_tokens("news", removed_tokens)
+        return ranked_results
+
+    def _rank_news_features(self, results, query):
+        snippet_similarities, title_similarities = compute_semantic_similarities(query, results)
         
-        model = LGBMRanker(
-            objective="lambdarank",
-            metric="ndcg",
-            boosting_type="dart",
-            n_estimators=100,
-            importance_type="gain",
-            max_position=21
-        )
-        model.fit(X, y, group=group)
+        X = minmax_columns(np.column_stack([
+            np.arange(len(results)),
+            snippet_similarities,
+            title_similarities
+        ]))
         
-        scores = model.predict(X)
+        scores = ranker.score("news", X, query, results)
         
         sorted_indices = np.argsort(scores)[::-1]
         ranked_results = [results[i] for i in sorted_indices]
         
-        return ranked_results
+        return collapse_near_duplicates(ranked_results)
 
 async def call_mistral_news_stream(query, search_results, news_search_engine):
     try:
@@ -186,7 +152,7 @@ async def call_mistral_news_stream(query, search_results, news_search_engine):
             ssl_context.verify_mode = ssl.CERT_NONE
 
         async with aiohttp.ClientSession() as session:
-            async with session.post(url, json=data, headers=headers, ssl=ssl_context) as resp:
+            async with azure_mistral_breaker.guard(session.post, url, json=data, headers=headers, ssl=ssl_context, ok=http_ok) as resp:
                 if resp.status != 200:
                     error_msg = await resp.text()
                     raise Exception(f"API request failed with status {resp.status}: {error_msg}")
@@ -254,7 +220,7 @@ async def call_claude_news_stream(query, search_results, news_search_engine):
 
         Based on these news search results and your extensive knowledge, provide a comprehensive and insightful response to the query. Your answer should synthesize information from multiple sources, highlight key developments, and provide a nuanced analysis of the topic. Include relevant citations and suggest areas for further reading or monitoring."""
 
-        async with anthropic_client.messages.stream(
+        async with bedrock_breaker.guard(anthropic_client.messages.stream,
             max_tokens=2046,
             messages=[
                 {
@@ -3,10 +3,14 @@ import json
 import asyncio
 from datetime import datetime
 from dotenv import load_dotenv
-from serpapi import GoogleSearch
 from anthropic import AsyncAnthropicBedrock
 import logging
-import re
+from app.api.v1.core.serpapi_client import serpapi_client
+from app.api.v1.core.serp_cache import normalize_query
+from app.api.v1.core.singleflight import SingleFlight
+from app.api.v1.core.circuit_breaker import bedrock_breaker
+from app.api.v1.core.json_stream import stream_json_events
+from app.api.v1.core.near_dup import collapse_near_duplicates, log_removed_tokens
 
 # Load environment variables and set up logging
 load_dotenv()
@@ -16,27 +20,22 @@ SERPAPI_API_KEY = os.getenv('serpapi_api_key')
 AWS_ACCESS_KEY_ID = os.getenv("AWS_ACCESS_KEY_ID")
 AWS_SECRET_ACCESS_KEY = os.getenv("AWS_SECRET_ACCESS_KEY")
 AWS_REGION = os.getenv("AWS_REGION", "us-east-1")
+# Section searches in flight at once per NewsPro request
+NEWSPRO_CONCURRENCY = int(os.getenv("NEWSPRO_CONCURRENCY", "3"))
 
 anthropic_client = AsyncAnthropicBedrock(aws_access_key=AWS_ACCESS_KEY_ID,
                                             aws_secret_key=AWS_SECRET_ACCESS_KEY,
                                             aws_region=AWS_REGION)
 
+newspro_plan_flights = SingleFlight("newspro_plan")
+
 class NewsProSearch:
     def __init__(self):
-        self.serpapi_key = os.getenv('serpapi_api_key')
         self.anthropic_client = anthropic_client
 
 
     async def fetch_news_results(self, query, num_results=10):
-        params = {
-            "api_key": self.serpapi_key,
-            "engine": "google_news",
-            "q": query,
-            "num": num_results
-        }
-        
-        search = GoogleSearch(params)
-        results = search.get_dict()
+        results = await serpapi_client.search_engine("google_news", query, num=num_results)
         return results.get("news_results", [])
 
     def format_search_results(self, search_data):
@@ -49,6 +48,9 @@ class NewsProSearch:
         } for result in search_data]
 
     async def generate_research_areas_and_queries(self, query):
+        return await newspro_plan_flights.do(normalize_query(query), self._generate_research_areas_and_queries, query)
+
+    async def _generate_research_areas_and_queries(self, query):
         system_prompt = """
             You are a search engine specialist with expertise in crafting precise, search engine-friendly queries to retrieve the most relevant and insightful information on any given topic. 
             Based on the user query, generate a set of 3 research-focused search queries. Each query should be optimized for search engines, covering key aspects such as historical context, current developments, expert opinions, and diverse perspectives. 
@@ -94,46 +96,55 @@ class NewsProSearch:
 
         user_message = f"User query: {query}"
 
+        semaphore = asyncio.Semaphore(NEWSPRO_CONCURRENCY)
+
+        async def search_section(questions):
+            async with semaphore:
+                return await self.fetch_news_results(" ".join(questions), num_results=3)
+
+        # A section's questions are searched together, so each search starts as its list closes in the planner stream
+        searches = {}
         try:
-            message = await self.anthropic_client.messages.create(
+            generated_json_queries = None
+            async for path, value in stream_json_events(
+                self.anthropic_client,
                 model="anthropic.claude-3-5-sonnet-20240620-v1:0",
                 max_tokens=500,
                 system=system_prompt,
                 messages=[
                         {"role": "user", "content": user_message}
                 ]
-            )
-            
-            if message:
-                json_match = re.search(r'\{[\s\S]*\}', message.content[0].text)
-                if json_match:
-                    try:
-                        generated_json_queries = json.loads(json_match.group(0))
-                        result = []
-                        for i, (key, questions) in enumerate(generated_json_queries.items(), 1):
-                            results = await self.fetch_news_results(" ".join(questions), num_results=3)
-                            formatted_results = self.format_search_results(results)
-
-                            result.append({
-                                f"Section_{i}": {
-                                    "research_area": key,
-                                    "questions": questions,
-                                    "sources": formatted_results
-                                }
-                            })
-                        return result
-                    except json.JSONDecodeError:
-                        logging.error("Invalid JSON content found in the response.")
-                        return None
-                else:
-                    logging.error("No JSON content found in the response.")
-                    return None
-            else:
-                logging.error("No message received from Claude API.")
-                return None
+            ):
+                if len(path) == 1 and isinstance(value, list):
+                    searches[path[0]] = asyncio.ensure_future(search_section(value))
+                elif not path:
+                    generated_json_queries = value
+
+            result = []
+            removed_tokens = 0
+            for i, (key, questions) in enumerate(generated_json_queries.items(), 1):
+                results = await searches[key]
+                formatted_results, section_tokens = collapse_near_duplicates(self.format_search_results(results))
+                removed_tokens += section_tokens
+
+                result.append({
+                    f"Section_{i}": {
+                        "research_area": key,
+                        "questions": questions,
+                        "sources": formatted_results
+                    }
+                })
+            log_removed_tokens("newspro", removed_tokens)
+            return result
+        except json.JSONDecodeError:
+            logging.error("Invalid JSON content found in the response.")
+            return None
         except Exception as e:
             logging.error(f"Error in generate_research_areas_and_queries: {e}")
             return None
+        finally:
+            for task in searches.values():
+                task.cancel()
 
     async def call_claude_llm_stream(self, query, sections):
         try:
@@ -181,7 +192,7 @@ class NewsProSearch:
 
             Based on these news search results and your extensive knowledge, provide a comprehensive and insightful response to the query. Your answer should synthesize information from multiple sources, highlight key developments, and provide a nuanced analysis of the topic. Include relevant citations and suggest areas for further reading or monitoring."""
 
-            async with self.anthropic_client.messages.stream(
+            async with bedrock_breaker.guard(self.anthropic_client.messages.stream,
                 model="anthropic.claude-3-5-sonnet-20240620-v1:0",
                 max_tokens=4096,
                 system=system_prompt,
@@ -0,0 +1,64 @@
+import os
+import time
+import uuid
+from collections import OrderedDict
+from dotenv import load_dotenv
+from app.api.v1.core.serp_cache import normalize_query
+
+load_dotenv()
+
+PLAN_STORE_TTL = float(os.getenv("PLAN_STORE_TTL", "900"))
+PLAN_STORE_SIZE = int(os.getenv("PLAN_STORE_SIZE", "1000"))
+
+
+class PlanStore:
+    # Pro plans from the SubQueries endpoints, kept so the matching Claude endpoint
+    # can skip planning and searching. Per worker, so a miss just means recomputing.
+
+    def __init__(self, ttl=PLAN_STORE_TTL, max_size=PLAN_STORE_SIZE):
+        self.ttl = ttl
+        self.max_size = max_size
+        self.plans = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.expired = 0
+        self.evictions = 0
+
+    def put(self, kind, query, plan):
+        plan_id = uuid.uuid4().hex
+        self.plans[plan_id] = (time.monotonic() + self.ttl, kind, normalize_query(query), plan)
+        while len(self.plans) > self.max_size:
+            self.plans.popitem(last=False)
+            self.evictions += 1
+        return plan_id
+
+    def get(self, plan_id, kind, query):
+        entry = self.plans.get(plan_id)
+        if entry is None:
+            self.misses += 1
+            return None
+        expires_at, plan_kind, plan_query, plan = entry
+        if time.monotonic() > expires_at:
+            del self.plans[plan_id]
+            self.expired += 1
+            return None
+        # A plan is only reused for the endpoint family and query it was made for
+        if plan_kind != kind or plan_query != normalize_query(query):
+            self.misses += 1
+            return None
+        self.hits += 1
+        return plan
+
+    def stats(self):
+        return {
+            "entries": len(self.plans),
+            "capacity": self.max_size,
+            "ttl": self.ttl,
+            "hits": self.hits,
+            "misses": self.misses,
+            "expired": self.expired,
+            "evictions": self.evictions,
+        }
+
+
+plan_store = PlanStore()
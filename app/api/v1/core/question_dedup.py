@@ -0,0 +1,56 @@
+import os
+import asyncio
+import logging
+from dotenv import load_dotenv
+from app.api.v1.core.embeddings import aembed_texts
+
+load_dotenv()
+
+# Cosine similarity at which two generated questions are treated as paraphrases
+QUESTION_DEDUP_THRESHOLD = float(os.getenv("QUESTION_DEDUP_THRESHOLD", "0.9"))
+
+
+class QuestionDeduplicator:
+    # Greedy clustering of planner questions as they stream in. The first question of
+    # a cluster is searched; later questions close to it share that search's future.
+    # Each question is embedded in its own task, so questions that close within one
+    # batcher window share an encode batch and the stream never waits on an embed;
+    # clustering itself still runs in the order the questions were scheduled.
+
+    def __init__(self, threshold=QUESTION_DEDUP_THRESHOLD):
+        self.threshold = threshold
+        self.representatives = []
+        self.searches_saved = 0
+        self.clustered = None
+
+    def schedule(self, question, start_search):
+        # Task resolving to the question's search results
+        previous = self.clustered
+        self.clustered = asyncio.get_running_loop().create_future()
+        return asyncio.ensure_future(self._search(question, start_search, previous, self.clustered))
+
+    async def _search(self, question, start_search, previous, clustered):
+        try:
+            try:
+                vector = (await aembed_texts([question]))[0]
+            except Exception as e:
+                logging.error(f"Question embedding failed, searching without dedup: {e}")
+                vector = None
+            if previous is not None:
+                await asyncio.shield(previous)
+            search = self._assign(question, vector, start_search)
+        finally:
+            if not clustered.done():
+                clustered.set_result(None)
+        return await search
+
+    def _assign(self, question, vector, start_search):
+        if vector is not None:
+            for representative, search in self.representatives:
+                if float(representative @ vector) >= self.threshold:
+                    self.searches_saved += 1
+                    return search
+        search = asyncio.ensure_future(start_search(question))
+        if vector is not None:
+            self.representatives.append((vector, search))
+        return search
@@ -0,0 +1,119 @@
+import os
+import time
+import asyncio
+import multiprocessing
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor
+from dotenv import load_dotenv
+
+load_dotenv()
+
+# thread: shares the worker's loaded models, enough while numpy/LightGBM/torch release the GIL
+# process: sidesteps the GIL entirely, but every pool process loads its own ranking models and encoder
+RANK_EXECUTOR = os.getenv("RANK_EXECUTOR", "thread")
+RANK_WORKERS = int(os.getenv("RANK_WORKERS", str(min(4, os.cpu_count() or 1))))
+# Jobs allowed to wait for a free worker before new ones are rejected
+RANK_QUEUE_LIMIT = int(os.getenv("RANK_QUEUE_LIMIT", "64"))
+
+
+class RankQueueFullError(Exception):
+    pass
+
+
+def _init_process_worker():
+    from app.api.v1.core.ranker import ranker
+    from app.api.v1.core.domain_authority import domain_authority_index
+    ranker.load()
+    domain_authority_index.load()
+
+
+def _timed(fn, *args):
+    # time.monotonic is system wide, so start times are comparable across pool processes
+    started = time.monotonic()
+    return started, fn(*args), time.monotonic()
+
+
+class RankExecutor:
+    # Runs embedding, feature extraction and ranking off the event loop so one
+    # request's ranking never freezes the token streams of the others
+
+    def __init__(self, kind=RANK_EXECUTOR, workers=RANK_WORKERS, queue_limit=RANK_QUEUE_LIMIT, initializer=_init_process_worker):
+        if kind not in ("thread", "process"):
+            raise ValueError(f"Unknown RANK_EXECUTOR {kind!r}, expected thread or process")
+        self.kind = kind
+        self.workers = workers
+        self.queue_limit = queue_limit
+        self.initializer = initializer
+        self.pool = None
+        self.in_flight = 0
+        self.peak_in_flight = 0
+        self.completed = 0
+        self.failed = 0
+        self.rejected = 0
+        self.wait_seconds = 0.0
+        self.max_wait_seconds = 0.0
+        self.run_seconds = 0.0
+
+    def _pool(self):
+        if self.pool is None:
+            if self.kind == "process":
+                self.pool = ProcessPoolExecutor(
+                    self.workers,
+                    mp_context=multiprocessing.get_context("spawn"),
+                    initializer=self.initializer,
+                )
+            else:
+                self.pool = ThreadPoolExecutor(self.workers, thread_name_prefix="rank")
+        return self.pool
+
+    def queued(self):
+        # The pool runs jobs in submission order, so anything past the worker count is waiting
+        return max(0, self.in_flight - self.workers)
+
+    async def run(self, fn, *args):
+        # fn and its arguments must be picklable in process mode
+        if self.in_flight >= self.workers + self.queue_limit:
+            self.rejected += 1
+            raise RankQueueFullError(f"Ranking queue is full ({self.queue_limit} waiting)")
+
+        self.in_flight += 1
+        self.peak_in_flight = max(self.peak_in_flight, self.in_flight)
+        submitted = time.monotonic()
+        try:
+            started, result, finished = await asyncio.wrap_future(self._pool().submit(_timed, fn, *args))
+        except Exception:
+            self.failed += 1
+            raise
+        finally:
+            self.in_flight -= 1
+
+        waited = started - submitted
+        self.completed += 1
+        self.wait_seconds += waited
+        self.max_wait_seconds = max(self.max_wait_seconds, waited)
+        self.run_seconds += finished - started
+        return result
+
+    def shutdown(self):
+        if self.pool is not None:
+            self.pool.shutdown(wait=True, cancel_futures=True)
+            self.pool = None
+
+    def stats(self):
+        return {
+            "kind": self.kind,
+            "workers": self.workers,
+            "queue_limit": self.queue_limit,
+            "in_flight": self.in_flight,
+            "queued": self.queued(),
+            "saturation": round(min(self.in_flight, self.workers) / self.workers, 2) if self.workers else 0.0,
+            "peak_in_flight": self.peak_in_flight,
+            "completed": self.completed,
+            "failed": self.failed,
+            "rejected": self.rejected,
+            "avg_wait_ms": round(self.wait_seconds / self.completed * 1000, 1) if self.completed else 0.0,
+            "max_wait_ms": round(self.max_wait_seconds * 1000, 1),
+            "avg_run_ms": round(self.run_seconds / self.completed * 1000, 1) if self.completed else 0.0,
+        }
+
+
+rank_executor = RankExecutor()
@@ -0,0 +1,108 @@
+import os
+import json
+import logging
+import threading
+import numpy as np
+import lightgbm as lgb
+from dotenv import load_dotenv
+
+load_dotenv()
+
+RANKER_MODEL_DIR = os.getenv("RANKER_MODEL_DIR", "models/ranker")
+RANKER_FEATURE_LOG = os.getenv("RANKER_FEATURE_LOG")
+
+# Column layout of the feature rows built by each ranking path
+RANKERS = {
+    "web": {
+        # One row per canonical URL; rank_<engine> is 1/position, 0 when that engine missed it
+        "features": [
+            "rank_google", "rank_bing", "rank_duckduckgo", "snippet_length", "query_count",
+            "semantic_similarity_snippet", "semantic_similarity_title", "domain_authority",
+            "content_freshness", "engine_count"
+        ],
+        "label_scale": 30,
+    },
+    "scholar": {
+        "features": [
+            "position", "snippet_length", "query_count", "semantic_similarity_snippet",
+            "semantic_similarity_title", "domain_authority", "content_freshness", "log_citations",
+            "engine_google", "engine_bing", "engine_duckduckgo", "engine_google_scholar"
+        ],
+        "label_scale": 30,
+    },
+    "news": {
+        "features": ["position", "semantic_similarity_snippet", "semantic_similarity_title"],
+        "label_scale": 20,
+    },
+}
+
+# Deterministic linear scorer over min-max scaled features, used when no model file is present
+FALLBACK_WEIGHTS = {
+    "position": -1.0,
+    "rank_google": 0.4,
+    "rank_bing": 0.3,
+    "rank_duckduckgo": 0.3,
+    "engine_count": 0.3,
+    "snippet_length": 0.1,
+    "query_count": 0.2,
+    "semantic_similarity_snippet": 1.0,
+    "semantic_similarity_title": 0.8,
+    "domain_authority": 0.3,
+    "content_freshness": 0.2,
+    "log_citations": 0.5,
+}
+
+
+class Ranker:
+    def __init__(self, model_dir=RANKER_MODEL_DIR, feature_log=RANKER_FEATURE_LOG):
+        self.model_dir = model_dir
+        self.feature_log = feature_log
+        self.boosters = {}
+        self.loaded = False
+        self._log_lock = threading.Lock()
+        self.fallback_weights = {
+            name: np.array([FALLBACK_WEIGHTS.get(feature, 0.0) for feature in spec["features"]])
+            for name, spec in RANKERS.items()
+        }
+
+    def load(self):
+        boosters = {}
+        for name in RANKERS:
+            path = os.path.join(self.model_dir, f"{name}.txt")
+            if os.path.exists(path):
+                booster = lgb.Booster(model_file=path)
+                expected = len(RANKERS[name]["features"])
+                if booster.num_feature() != expected:
+                    logging.error(f"{name} ranker at {path} expects {booster.num_feature()} features, not {expected}; retrain it. Using fallback scorer")
+                    continue
+                boosters[name] = booster
+                logging.info(f"Loaded {name} ranker from {path}")
+            else:
+                logging.info(f"No {name} ranker at {path}, using fallback scorer")
+        self.boosters = boosters
+        self.loaded = True
+
+    def score(self, name, X, query=None, results=None):
+        if not self.loaded:
+            self.load()
+        if self.feature_log:
+            self.log_features(name, X, query, results)
+
+        booster = self.boosters.get(name)
+        if booster is not None:
+            return booster.predict(X)
+        return X @ self.fallback_weights[name]
+
+    def log_features(self, name, X, query, results):
+        record = {
+            "ranker": name,
+            "query": query,
+            "features": np.asarray(X).tolist(),
+            "links": [result.get('link', '') for result in results] if results else None,
+        }
+        with self._log_lock:
+            with open(self.feature_log, "a") as f:
+                f.write(json.dumps(record) + "\n")
+
+
+ranker = Ranker()
@@ -4,6 +4,7 @@ import ssl
 import certifi
 import aiohttp
 from dotenv import load_dotenv
+from app.api.v1.core.circuit_breaker import azure_mistral_breaker, http_ok
 
 load_dotenv()
 
@@ -55,7 +56,7 @@ async def generate_related_questions(query):
             ssl_context.verify_mode = ssl.CERT_NONE
 
         async with aiohttp.ClientSession() as session:
-            async with session.post(url, json=data, headers=headers, ssl=ssl_context) as resp:
+            async with azure_mistral_breaker.guard(session.post, url, json=data, headers=headers, ssl=ssl_context, ok=http_ok) as resp:
                 if resp.status != 200:
                     error_msg = await resp.text()
                     raise Exception(f"API request failed with status {resp.status}: {error_msg}")
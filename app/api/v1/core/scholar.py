@@ -3,12 +3,13 @@
 import os
 from datetime import datetime
 from dotenv import load_dotenv
-from serpapi import GoogleSearch
 import aiohttp
 import ssl
 import certifi
 from anthropic import AsyncAnthropicBedrock
 import json
+from app.api.v1.core.serpapi_client import serpapi_client
+from app.api.v1.core.circuit_breaker import bedrock_breaker, azure_mistral_breaker, http_ok
 
 load_dotenv()
 
@@ -25,21 +26,13 @@ anthropic_client = AsyncAnthropicBedrock(
 )
 
 class ScholarSearchEngine:
-    def __init__(self):
-        self.api_key = os.getenv('serpapi_api_key')
-
     async def fetch_google_scholar_results(self, query, num_results=10):
-        params = {
-            "api_key": self.api_key,
-            "engine": "google_scholar",
-            "q": query,
-            "num": num_results,
-            "sort": "date",
-            "as_ylo": datetime.now().year - 5
-        }
-        
-        search = GoogleSearch(params)
-        results = search.get_dict()
+        results = await serpapi_client.search_engine(
+            "google_scholar", query,
+            num=num_results,
+            sort="date",
+            as_ylo=datetime.now().year - 5
+        )
         return results.get("organic_results", [])
 
     async def format_scholar_results(self, search_data):
@@ -98,7 +91,7 @@ async def call_mistral_scholar_stream(query, search_results, scholar_search_engi
             ssl_context.verify_mode = ssl.CERT_NONE
 
         async with aiohttp.ClientSession() as session:
-            async with session.post(url, json=data, headers=headers, ssl=ssl_context) as resp:
+            async with azure_mistral_breaker.guard(session.post, url, json=data, headers=headers, ssl=ssl_context, ok=http_ok) as resp:
                 if resp.status != 200:
                     error_msg = await resp.text()
                     raise Exception(f"API request failed with status {resp.status}: {error_msg}")
@@ -133,7 +126,7 @@ async def call_claude_scholar_stream(query, search_results, scholar_search_engin
 
         Based on these search results and your extensive knowledge of academic literature, provide a comprehensive and insightful response to the query. Your answer should synthesize information from multiple sources, highlight key findings and methodologies, and provide a critical analysis of the current state of research on this topic. Include relevant citations and suggest directions for future research."""
 
-        async with anthropic_client.messages.stream(
+        async with bedrock_breaker.guard(anthropic_client.messages.stream,
             max_tokens=2046,
             messages=[
                 {
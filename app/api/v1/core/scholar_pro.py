@@ -1,13 +1,18 @@
 import logging
-from serpapi import GoogleSearch
 from datetime import datetime
 from anthropic import AsyncAnthropicBedrock
 from dotenv import load_dotenv
 import os
 import json
-import re
 import asyncio
 import aiohttp
+from app.api.v1.core.serpapi_client import serpapi_client
+from app.api.v1.core.serp_cache import normalize_query
+from app.api.v1.core.singleflight import SingleFlight
+from app.api.v1.core.circuit_breaker import bedrock_breaker
+from app.api.v1.core.json_stream import stream_json_events
+from app.api.v1.core.question_dedup import QuestionDeduplicator
+from app.api.v1.core.near_dup import collapse_near_duplicates, log_removed_tokens
 
 # Load environment variables and set up logging
 load_dotenv()
@@ -18,30 +23,21 @@ SERPAPI_API_KEY = os.getenv('serpapi_api_key')
 AWS_ACCESS_KEY_ID = os.getenv("AWS_ACCESS_KEY_ID")
 AWS_SECRET_ACCESS_KEY = os.getenv("AWS_SECRET_ACCESS_KEY")
 AWS_REGION = os.getenv("AWS_REGION", "us-east-1")
+# Question searches in flight at once per ScholarPro request, across all sections
+SCHOLARPRO_CONCURRENCY = int(os.getenv("SCHOLARPRO_CONCURRENCY", "9"))
 
 anthropic_client = AsyncAnthropicBedrock(aws_access_key=AWS_ACCESS_KEY_ID,
                                             aws_secret_key=AWS_SECRET_ACCESS_KEY,
                                             aws_region=AWS_REGION)
 
+scholarpro_plan_flights = SingleFlight("scholarpro_plan")
+
 class ScholarProEngine:
     def __init__(self):
-        self.serpapi_key = os.getenv('serpapi_api_key')
         self.anthropic_client = anthropic_client
-        self.session = None
-
-    async def initialize(self):
-        self.session = aiohttp.ClientSession()
-
-    async def close(self):
-        if self.session:
-            await self.session.close()
 
     async def fetch_google_scholar_results(self, query, num_results):
-        if not self.session:
-            await self.initialize()
-
         params = {
-            "api_key": self.serpapi_key,
             "engine": "google_scholar",
             "q": query,
             "num": num_results,
@@ -50,13 +46,8 @@ class ScholarProEngine:
         }
         
         try:
-            async with self.session.get('https://serpapi.com/search', params=params) as response:
-                if response.status == 200:
-                    results = await response.json()
-                    return results.get("organic_results", [])
-                else:
-                    logging.error(f"SerpAPI request failed with status {response.status}")
-                    return []
+            results = await serpapi_client.search(params)
+            return results.get("organic_results", [])
         except aiohttp.ClientError as e:
             logging.error(f"Error fetching Google Scholar results: {e}")
             return []
@@ -72,6 +63,9 @@ class ScholarProEngine:
         } for result in search_data]
 
     async def generate_research_areas_and_queries(self, query):
+        return await scholarpro_plan_flights.do(normalize_query(query), self._generate_research_areas_and_queries, query)
+
+    async def _generate_research_areas_and_queries(self, query):
         system_prompt = """
             You are a search engine specialist with expertise in crafting precise, search engine-friendly queries to retrieve the most relevant and insightful information on any given topic. 
             Based on the user query, generate a set of 3 research-focused search queries. Each query should be optimized for search engines, covering key aspects such as historical context, current developments, expert opinions, and diverse perspectives. 
@@ -117,58 +111,71 @@ class ScholarProEngine:
 
         user_message = f"User query: {query}"
 
+        semaphore = asyncio.Semaphore(SCHOLARPRO_CONCURRENCY)
+
+        async def search_question(question):
+            async with semaphore:
+                return await self.fetch_google_scholar_results(question, num_results=1)
+
+        # Each question is searched as soon as its string closes in the planner stream,
+        # unless it paraphrases an earlier question whose search it then shares
+        dedup = QuestionDeduplicator()
+        searches = {}
         try:
-            message = await self.anthropic_client.messages.create(
+            generated_json_queries = None
+            async for path, value in stream_json_events(
+                self.anthropic_client,
                 model="anthropic.claude-3-5-sonnet-20240620-v1:0",
                 max_tokens=500,
                 system=system_prompt,
                 messages=[
                         {"role": "user", "content": user_message}
                 ]
-            )
-            
-            if message:
-                json_match = re.search(r'\{[\s\S]*\}', message.content[0].text)
-                if json_match:
-                    try:
-                        generated_json_queries = json.loads(json_match.group(0))
-                        result = []
-                        for i, (key, questions) in enumerate(generated_json_queries.items(), 1):
-                            tasks = [self.fetch_google_scholar_results(question, num_results=1) for question in questions]
-                            results = await asyncio.gather(*tasks)
-                            
-                            formatted_results = [
-                                result 
-                                for search_results in results 
-                                for result in self.format_scholar_results(search_results)
-                            ]
-
-                            result.append({
-                                f"Section_{i}": {
-                                    "research_area": key,
-                                    "questions": questions,
-                                    "sources": formatted_results
-                                }
-                            })
-                        return result
-                    except json.JSONDecodeError:
-                        logging.error("Invalid JSON content found in the response.")
-                        return None
-                else:
-                    logging.error("No JSON content found in the response.")
-                    return None
-            else:
-                logging.error("No message received from Claude API.")
-                return None
+            ):
+                if len(path) == 2 and isinstance(value, str):
+                    searches.setdefault(path[0], []).append(dedup.schedule(value, search_question))
+                elif not path:
+                    generated_json_queries = value
+
+            # Searches already run concurrently across sections; this only reassembles them in section order
+            result = []
+            removed_tokens = 0
+            for i, (key, questions) in enumerate(generated_json_queries.items(), 1):
+                results = await asyncio.gather(*searches.get(key, []))
+                
+                formatted_results, section_tokens = collapse_near_duplicates([
+                    result 
+                    for search_results in results 
+                    for result in self.format_scholar_results(search_results)
+                ])
+                removed_tokens += section_tokens
+
+                result.append({
+                    f"Section_{i}": {
+                        "research_area": key,
+                        "questions": questions,
+                        "sources": formatted_results
+                    }
+                })
+            log_removed_tokens("scholarpro", removed_tokens)
+            return result, dedup.searches_saved
+        except json.JSONDecodeError:
+            logging.error("Invalid JSON content found in the response.")
+            return None, 0
         except Exception as e:
             logging.error(f"Error in generate_research_areas_and_queries: {e}")
-            return None
+            return None, 0
+        finally:
+            for tasks in searches.values():
+                for task in tasks:
+                    task.cancel()
 
-    async def vexoo_claude_scholar(self, query):
+    async def vexoo_claude_scholar(self, query, research_areas=None):
         try:
             web_results = []
             progress_updates = []
-            research_areas = await self.generate_research_areas_and_queries(query)
+            if research_areas is None:
+                research_areas, _ = await self.generate_research_areas_and_queries(query)
             
             if research_areas is None:
                 yield "Sorry, I couldn't generate a response due to an error in processing the query."
@@ -232,7 +239,7 @@ class ScholarProEngine:
         Based on these search results and your extensive knowledge, provide an exceptionally detailed, comprehensive, and insightful response to the query. Your answer should be characterized by its depth, precision, and attention to nuanced details. Ensure your response is directly relevant, incorporates the latest information, and is tailored to the specific nature and depth of the question. If the query is coding-related, include detailed code examples with explanations. Anticipate and address potential follow-up questions in your response. Remember to include a detailed "Sources" section at the end of your response, with numbered references and URLs for further reading."""
 
             full_response = ""
-            async with self.anthropic_client.messages.stream(
+            async with bedrock_breaker.guard(self.anthropic_client.messages.stream,
                 model="anthropic.claude-3-5-sonnet-20240620-v1:0",
                 max_tokens=4096,  # Increased token limit
                 system=system_prompt,
@@ -0,0 +1,174 @@
+import os
+import re
+import json
+import time
+import sqlite3
+import asyncio
+import hashlib
+import logging
+import threading
+from collections import OrderedDict
+from dotenv import load_dotenv
+
+load_dotenv()
+
+SERP_CACHE_SIZE = int(os.getenv("SERP_CACHE_SIZE", "5000"))
+SERP_CACHE_SQLITE_PATH = os.getenv("SERP_CACHE_SQLITE_PATH")
+DEFAULT_ENGINE_TTLS = {
+    "google": 3600,
+    "bing": 3600,
+    "duckduckgo": 3600,
+    "google_news": 300,
+    "google_finance": 60,
+    "google_scholar": 86400,
+}
+ENGINE_TTLS = {
+    engine: float(os.getenv(f"SERP_CACHE_TTL_{engine.upper()}", ttl))
+    for engine, ttl in DEFAULT_ENGINE_TTLS.items()
+}
+
+# How long past its TTL an entry may still be served while a refresh runs, as a multiple
+# of the engine's TTL; SERP_CACHE_STALE_<ENGINE> sets an engine's window in seconds
+SERP_CACHE_STALE_MULTIPLE = float(os.getenv("SERP_CACHE_STALE_MULTIPLE", "2"))
+# Quotes are worthless once expired, so these are only ever served fresh
+NO_STALE_ENGINES = {"google_finance"}
+ENGINE_STALE_SECONDS = {
+    engine: float(os.getenv(
+        f"SERP_CACHE_STALE_{engine.upper()}",
+        0 if engine in NO_STALE_ENGINES else ttl * SERP_CACHE_STALE_MULTIPLE
+    ))
+    for engine, ttl in ENGINE_TTLS.items()
+}
+
+EXCLUDED_PARAMS = {"api_key"}
+
+
+def normalize_query(query):
+    return re.sub(r"\s+", " ", str(query)).strip().lower()
+
+
+def cache_key(params):
+    normalized = {
+        key: normalize_query(value) if key == "q" else str(value)
+        for key, value in params.items()
+        if key not in EXCLUDED_PARAMS and value is not None
+    }
+    return hashlib.sha1(json.dumps(normalized, sort_keys=True).encode("utf-8")).hexdigest()
+
+
+class SerpResponseCache:
+    # In-memory LRU in front of an optional SQLite table. Payloads are kept as JSON
+    # text so every caller gets its own copy to mutate.
+
+    def __init__(self, max_size=SERP_CACHE_SIZE, sqlite_path=SERP_CACHE_SQLITE_PATH):
+        self.max_size = max_size
+        self.memory = OrderedDict()
+        self.sqlite_path = sqlite_path
+        self.db = None
+        self._db_lock = threading.Lock()
+        self.hits = 0
+        self.stale_hits = 0
+        self.sqlite_hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def ttl(self, engine):
+        return ENGINE_TTLS.get(engine, 3600)
+
+    def stale_seconds(self, engine):
+        return ENGINE_STALE_SECONDS.get(engine, self.ttl(engine) * SERP_CACHE_STALE_MULTIPLE)
+
+    def _connect(self):
+        if self.db is None and self.sqlite_path:
+            self.db = sqlite3.connect(self.sqlite_path, check_same_thread=False)
+            self.db.execute("PRAGMA journal_mode=WAL")
+            self.db.execute(
+                "CREATE TABLE IF NOT EXISTS serp_cache ("
+                "key TEXT PRIMARY KEY, engine TEXT, expires_at REAL, payload TEXT)"
+            )
+            self.db.commit()
+        return self.db
+
+    def _sqlite_get(self, key):
+        with self._db_lock:
+            db = self._connect()
+            return db.execute("SELECT expires_at, engine, payload FROM serp_cache WHERE key = ?", (key,)).fetchone()
+
+    def _sqlite_set(self, key, engine, expires_at, payload):
+        with self._db_lock:
+            db = self._connect()
+            db.execute(
+                "INSERT OR REPLACE INTO serp_cache (key, engine, expires_at, payload) VALUES (?, ?, ?, ?)",
+                (key, engine, expires_at, payload),
+            )
+            # get() applies each engine's own window; this only drops rows past the longest one
+            db.execute("DELETE FROM serp_cache WHERE expires_at < ?", (time.time() - max(ENGINE_STALE_SECONDS.values()),))
+            db.commit()
+
+    def _remember(self, key, expires_at, engine, payload):
+        self.memory[key] = (expires_at, engine, payload)
+        self.memory.move_to_end(key)
+        while len(self.memory) > self.max_size:
+            self.memory.popitem(last=False)
+            self.evictions += 1
+
+    async def get(self, key):
+        # Returns (value, fresh) or None
+        entry = self.memory.get(key)
+        if entry is not None:
+            self.memory.move_to_end(key)
+        elif self.sqlite_path:
+            try:
+                entry = await asyncio.to_thread(self._sqlite_get, key)
+            except sqlite3.Error as e:
+                logging.error(f"SerpAPI cache read failed: {e}")
+                entry = None
+            if entry is not None:
+                self.sqlite_hits += 1
+                self._remember(key, *entry)
+
+        now = time.time()
+        if entry is None or now > entry[0] + self.stale_seconds(entry[1]):
+            self.misses += 1
+            return None
+
+        fresh = now <= entry[0]
+        if fresh:
+            self.hits += 1
+        else:
+            self.stale_hits += 1
+        return json.loads(entry[2]), fresh
+
+    async def set(self, key, engine, value):
+        expires_at = time.time() + self.ttl(engine)
+        payload = json.dumps(value)
+        self._remember(key, expires_at, engine, payload)
+        if self.sqlite_path:
+            try:
+                await asyncio.to_thread(self._sqlite_set, key, engine, expires_at, payload)
+            except sqlite3.Error as e:
+                logging.error(f"SerpAPI cache write failed: {e}")
+
+    def stats(self):
+        lookups = self.hits + self.stale_hits + self.misses
+        return {
+            "hits": self.hits,
+            "stale_hits": self.stale_hits,
+            "sqlite_hits": self.sqlite_hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "hit_rate": round((self.hits + self.stale_hits) / lookups, 4) if lookups else 0.0,
+            "memory_entries": len(self.memory),
+            "memory_capacity": self.max_size,
+            "ttls": ENGINE_TTLS,
+            "stale_seconds": ENGINE_STALE_SECONDS,
+        }
+
+    def close(self):
+        with self._db_lock:
+            if self.db is not None:
+                self.db.close()
+                self.db = None
+
+
+serp_cache = SerpResponseCache()
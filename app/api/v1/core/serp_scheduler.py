@@ -0,0 +1,154 @@
+import os
+import time
+import asyncio
+from collections import deque, Counter, defaultdict
+from contextvars import ContextVar
+from dotenv import load_dotenv
+
+load_dotenv()
+
+# Sized to the SerpAPI plan; the bucket refills continuously and holds at most SERPAPI_BURST tokens
+SERPAPI_RATE_LIMIT_PER_HOUR = float(os.getenv("SERPAPI_RATE_LIMIT_PER_HOUR", "3600"))
+SERPAPI_BURST = int(os.getenv("SERPAPI_BURST", "20"))
+SERPAPI_QUEUE_LIMIT = int(os.getenv("SERPAPI_QUEUE_LIMIT", "200"))
+
+# Highest priority first
+LANES = ("interactive", "pro", "background")
+LANE_MAX_WAIT = {
+    "interactive": float(os.getenv("SERPAPI_MAX_WAIT_INTERACTIVE", "5")),
+    "pro": float(os.getenv("SERPAPI_MAX_WAIT_PRO", "20")),
+    # A background refresh only runs if a token is free right now
+    "background": float(os.getenv("SERPAPI_MAX_WAIT_BACKGROUND", "0")),
+}
+
+serp_lane = ContextVar("serp_lane", default="interactive")
+serp_endpoint = ContextVar("serp_endpoint", default="internal")
+
+
+class QuotaExceededError(Exception):
+    pass
+
+
+class TokenBucketScheduler:
+    def __init__(self, rate_per_second, burst, queue_limit=SERPAPI_QUEUE_LIMIT):
+        self.rate = rate_per_second
+        self.burst = burst
+        self.queue_limit = queue_limit
+        self.tokens = float(burst)
+        self.updated = time.monotonic()
+        self.queues = {lane: deque() for lane in LANES}
+        self.timer = None
+        self.granted = Counter()
+        self.tokens_by_endpoint = Counter()
+        self.rejected = Counter()
+        self.timed_out = Counter()
+        self.wait_seconds = defaultdict(float)
+        self.max_wait_seconds = defaultdict(float)
+
+    def _refill(self):
+        now = time.monotonic()
+        self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def queued(self):
+        return sum(len(queue) for queue in self.queues.values())
+
+    async def acquire(self, lane=None, endpoint=None):
+        lane = lane or serp_lane.get()
+        endpoint = endpoint or serp_endpoint.get()
+        self._refill()
+
+        # Take a token straight away unless someone at the same or higher priority is already waiting
+        ahead = any(self.queues[other] for other in LANES[:LANES.index(lane) + 1])
+        if self.tokens >= 1 and not ahead:
+            self.tokens -= 1
+            self._grant(lane, endpoint, 0.0)
+            return
+
+        max_wait = LANE_MAX_WAIT[lane]
+        if max_wait <= 0 or self.queued() >= self.queue_limit:
+            self.rejected[lane] += 1
+            raise QuotaExceededError(f"SerpAPI rate limit reached for {lane} requests")
+
+        waiter = asyncio.get_running_loop().create_future()
+        self.queues[lane].append(waiter)
+        self._schedule()
+        start = time.monotonic()
+        try:
+            await asyncio.wait_for(waiter, max_wait)
+        except asyncio.TimeoutError:
+            self.timed_out[lane] += 1
+            raise QuotaExceededError(f"No SerpAPI token within {max_wait}s for {lane} requests") from None
+        except asyncio.CancelledError:
+            # Granted just as the caller gave up, so hand the token back
+            if waiter.done() and not waiter.cancelled():
+                self.tokens = min(self.burst, self.tokens + 1)
+                self._schedule()
+            raise
+        finally:
+            if waiter in self.queues[lane]:
+                self.queues[lane].remove(waiter)
+        self._grant(lane, endpoint, time.monotonic() - start)
+
+    def _grant(self, lane, endpoint, waited):
+        self.granted[lane] += 1
+        self.tokens_by_endpoint[endpoint] += 1
+        self.wait_seconds[lane] += waited
+        self.max_wait_seconds[lane] = max(self.max_wait_seconds[lane], waited)
+
+    def _schedule(self):
+        if self.timer is None and self.queued():
+            delay = max(0.0, (1 - self.tokens) / self.rate)
+            self.timer = asyncio.get_running_loop().call_later(delay, self._drain)
+
+    def _drain(self):
+        self.timer = None
+        self._refill()
+        for lane in LANES:
+            queue = self.queues[lane]
+            while queue and self.tokens >= 1:
+                waiter = queue.popleft()
+                if waiter.done():
+                    continue
+                waiter.set_result(None)
+                self.tokens -= 1
+        self._schedule()
+
+    def stats(self):
+        self._refill()
+        return {
+            "tokens": round(self.tokens, 2),
+            "rate_per_hour": self.rate * 3600,
+            "burst": self.burst,
+            "queued": {lane: len(self.queues[lane]) for lane in LANES},
+            "granted": {lane: self.granted[lane] for lane in LANES},
+            "rejected": {lane: self.rejected[lane] for lane in LANES},
+            "timed_out": {lane: self.timed_out[lane] for lane in LANES},
+            "avg_wait_ms": {
+                lane: round(self.wait_seconds[lane] / self.granted[lane] * 1000, 1) if self.granted[lane] else 0.0
+                for lane in LANES
+            },
+            "max_wait_ms": {lane: round(self.max_wait_seconds[lane] * 1000, 1) for lane in LANES},
+            "tokens_by_endpoint": dict(self.tokens_by_endpoint),
+        }
+
+
+class SerpLaneMiddleware:
+    # Tags each request with its scheduler lane and endpoint; Pro fan-out yields to interactive search
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            return await self.app(scope, receive, send)
+        endpoint = scope["path"].rstrip("/").rsplit("/", 1)[-1] or "/"
+        lane_token = serp_lane.set("pro" if "Pro" in endpoint else "interactive")
+        endpoint_token = serp_endpoint.set(endpoint)
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            serp_lane.reset(lane_token)
+            serp_endpoint.reset(endpoint_token)
+
+
+serp_scheduler = TokenBucketScheduler(SERPAPI_RATE_LIMIT_PER_HOUR / 3600, SERPAPI_BURST)
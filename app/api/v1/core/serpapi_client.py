@@ -0,0 +1,191 @@
+import os
+import ssl
+import copy
+import time
+import asyncio
+import logging
+import certifi
+import aiohttp
+from dotenv import load_dotenv
+from app.api.v1.core.serp_cache import serp_cache, cache_key
+from app.api.v1.core.singleflight import SingleFlight
+from app.api.v1.core.circuit_breaker import CircuitBreaker, CircuitOpenError, http_ok
+from app.api.v1.core.serp_scheduler import serp_scheduler, serp_lane, QuotaExceededError
+
+load_dotenv()
+
+SERPAPI_URL = "https://serpapi.com/search"
+SERPAPI_ENGINES = ("google", "bing", "duckduckgo", "google_news", "google_scholar", "google_finance")
+SERPAPI_CONNECTION_LIMIT = int(os.getenv("SERPAPI_CONNECTION_LIMIT", "100"))
+SERPAPI_CONNECTION_LIMIT_PER_HOST = int(os.getenv("SERPAPI_CONNECTION_LIMIT_PER_HOST", "50"))
+SERPAPI_DNS_CACHE_TTL = int(os.getenv("SERPAPI_DNS_CACHE_TTL", "300"))
+SERPAPI_KEEPALIVE_TIMEOUT = float(os.getenv("SERPAPI_KEEPALIVE_TIMEOUT", "60"))
+SERPAPI_TIMEOUT = float(os.getenv("SERPAPI_TIMEOUT", "30"))
+SERPAPI_CONNECT_TIMEOUT = float(os.getenv("SERPAPI_CONNECT_TIMEOUT", "5"))
+SERPAPI_SLOW_SECONDS = float(os.getenv("SERPAPI_SLOW_SECONDS", "5"))
+# Failed and circuit-open responses are served from here for this long
+SERPAPI_NEGATIVE_TTL = float(os.getenv("SERPAPI_NEGATIVE_TTL", "30"))
+
+serpapi_flights = SingleFlight("serpapi")
+serpapi_breakers = {
+    engine: CircuitBreaker(f"serpapi_{engine}", slow_seconds=SERPAPI_SLOW_SECONDS)
+    for engine in SERPAPI_ENGINES
+}
+
+
+class SerpAPIClient:
+    # One keep-alive connection pool to serpapi.com per worker, opened in the
+    # app lifespan and shared by every vertical.
+
+    def __init__(self, api_key=None):
+        self.api_key = api_key or os.getenv('serpapi_api_key')
+        self.session = None
+        self.refreshing = {}
+        self.negative = {}
+        self.negative_hits = 0
+        self.hedges = 0
+        self.hedge_wins = 0
+
+    async def start(self):
+        if self.session is None or self.session.closed:
+            connector = aiohttp.TCPConnector(
+                limit=SERPAPI_CONNECTION_LIMIT,
+                limit_per_host=SERPAPI_CONNECTION_LIMIT_PER_HOST,
+                ttl_dns_cache=SERPAPI_DNS_CACHE_TTL,
+                keepalive_timeout=SERPAPI_KEEPALIVE_TIMEOUT,
+                ssl=ssl.create_default_context(cafile=certifi.where()),
+            )
+            timeout = aiohttp.ClientTimeout(total=SERPAPI_TIMEOUT, connect=SERPAPI_CONNECT_TIMEOUT)
+            self.session = aiohttp.ClientSession(connector=connector, timeout=timeout)
+        return self.session
+
+    async def close(self):
+        for task in list(self.refreshing.values()):
+            task.cancel()
+        self.refreshing.clear()
+        if self.session is not None and not self.session.closed:
+            await self.session.close()
+        self.session = None
+
+    async def search(self, params):
+        key = cache_key(params)
+        cached = await serp_cache.get(key)
+        if cached is not None:
+            results, fresh = cached
+            if not fresh:
+                self._refresh(key, params)
+            return results
+
+        negative = self.negative.get(key)
+        if negative is not None and negative[0] > time.monotonic():
+            self.negative_hits += 1
+            return dict(negative[1])
+
+        try:
+            # Everyone who joined the flight shares its result, so each gets its own copy to mutate
+            return copy.deepcopy(await serpapi_flights.do(key, self._fetch_and_store, key, params))
+        except CircuitOpenError as e:
+            return self._remember_negative(key, {"error": str(e)})
+        except QuotaExceededError as e:
+            return {"error": str(e)}
+
+    def _remember_negative(self, key, results):
+        now = time.monotonic()
+        if len(self.negative) > 1000:
+            self.negative = {k: entry for k, entry in self.negative.items() if entry[0] > now}
+        self.negative[key] = (now + SERPAPI_NEGATIVE_TTL, results)
+        return dict(results)
+
+    async def search_hedged(self, params, hedge_after):
+        # Returns (results, hedged). If the first request has not answered within
+        # hedge_after seconds, race it against a second, uncoalesced request.
+        if not hedge_after:
+            return await self.search(params), False
+        primary = asyncio.ensure_future(self.search(params))
+        backup = None
+        try:
+            done, _ = await asyncio.wait({primary}, timeout=hedge_after)
+            if done:
+                return primary.result(), False
+
+            self.hedges += 1
+            backup = asyncio.ensure_future(self._fetch_and_store(cache_key(params), params))
+            pending = {primary, backup}
+            error = None
+            while pending:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    if task.exception() is None and "error" not in task.result():
+                        if task is backup:
+                            self.hedge_wins += 1
+                        return task.result(), True
+                    error = task.exception() or error
+            if error is not None:
+                raise error
+            return primary.result(), True
+        finally:
+            # The shared flight is shielded, so this only drops our interest in it
+            for task in (primary, backup):
+                if task is not None and not task.done():
+                    task.cancel()
+
+    def _refresh(self, key, params):
+        # Stale-while-revalidate: the caller already has the stale entry
+        if key not in self.refreshing:
+            task = asyncio.create_task(self._background_fetch(key, params))
+            self.refreshing[key] = task
+            task.add_done_callback(lambda t: self._refreshed(key, t))
+
+    def _refreshed(self, key, task):
+        self.refreshing.pop(key, None)
+        if not task.cancelled() and task.exception() is not None and not isinstance(task.exception(), (CircuitOpenError, QuotaExceededError)):
+            logging.error(f"Background SerpAPI refresh failed: {task.exception()}")
+
+    async def _background_fetch(self, key, params):
+        # Runs in its own task, so the lane only changes for the refresh
+        serp_lane.set("background")
+        return await self._fetch_and_store(key, params)
+
+    async def _fetch_and_store(self, key, params):
+        results = await self.fetch(params)
+        if "error" in results:
+            self._remember_negative(key, results)
+        else:
+            await serp_cache.set(key, params.get("engine"), results)
+        return results
+
+    async def fetch(self, params):
+        session = await self.start()
+        params = {key: value for key, value in {"api_key": self.api_key, **params}.items() if value is not None}
+        engine = params.get("engine", "google")
+        if engine not in serpapi_breakers:
+            serpapi_breakers[engine] = CircuitBreaker(f"serpapi_{engine}", slow_seconds=SERPAPI_SLOW_SECONDS)
+        breaker = serpapi_breakers[engine]
+        # Do not spend quota on an engine whose circuit is open
+        breaker.reject_if_open()
+        await serp_scheduler.acquire()
+        async with breaker.guard(session.get, SERPAPI_URL, params=params, ok=http_ok) as response:
+            if response.status == 200:
+                return await response.json(content_type=None)
+            error = await response.text()
+            logging.error(f"SerpAPI {params.get('engine')} request failed with status {response.status}: {error[:200]}")
+            return {"error": error}
+
+    def stats(self):
+        now = time.monotonic()
+        return {
+            "negative_entries": sum(1 for expires_at, _ in self.negative.values() if expires_at > now),
+            "negative_hits": self.negative_hits,
+            "negative_ttl": SERPAPI_NEGATIVE_TTL,
+            "hedges": self.hedges,
+            "hedge_wins": self.hedge_wins,
+            "refreshing": len(self.refreshing),
+        }
+
+    async def search_engine(self, engine, query, **params):
+        if engine not in SERPAPI_ENGINES:
+            raise ValueError(f"Unsupported SerpAPI engine {engine!r}")
+        return await self.search({"engine": engine, "q": query, **params})
+
+
+serpapi_client = SerpAPIClient()
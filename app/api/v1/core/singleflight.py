@@ -0,0 +1,63 @@
+import asyncio
+import hashlib
+import logging
+from collections import deque
+
+
+def key_digest(key):
+    # Keys hold raw user queries (and news result links), so stats and logs only
+    # ever show this short hash of them
+    return hashlib.sha1(repr(key).encode("utf-8")).hexdigest()[:12]
+
+
+class SingleFlight:
+    # Concurrent calls with the same key share one in-flight task. Every caller
+    # receives the same result object, so treat it as read-only.
+
+    groups = {}
+
+    def __init__(self, name, history=100):
+        self.name = name
+        self.flights = {}
+        self.completed = 0
+        self.joined = 0
+        self.max_callers = 0
+        self.recent = deque(maxlen=history)
+        SingleFlight.groups[name] = self
+
+    async def do(self, key, fn, *args, **kwargs):
+        flight = self.flights.get(key)
+        if flight is None:
+            flight = {"task": asyncio.ensure_future(fn(*args, **kwargs)), "callers": 1}
+            self.flights[key] = flight
+            flight["task"].add_done_callback(lambda task: self._land(key, flight))
+        else:
+            flight["callers"] += 1
+            self.joined += 1
+        # Shielded so one cancelled caller does not cancel the work for the others
+        return await asyncio.shield(flight["task"])
+
+    def _land(self, key, flight):
+        if self.flights.get(key) is flight:
+            del self.flights[key]
+        callers = flight["callers"]
+        self.completed += 1
+        self.max_callers = max(self.max_callers, callers)
+        self.recent.append({"key": key_digest(key), "callers": callers})
+        if callers > 1:
+            logging.info(f"singleflight {self.name}: {callers} callers shared flight {key_digest(key)}")
+        if not flight["task"].cancelled():
+            flight["task"].exception()
+
+    def stats(self):
+        return {
+            "in_flight": {key_digest(key): flight["callers"] for key, flight in self.flights.items()},
+            "completed": self.completed,
+            "joined": self.joined,
+            "max_callers": self.max_callers,
+            "recent": list(self.recent),
+        }
+
+    @classmethod
+    def report(cls):
+        return {name: group.stats() for name, group in cls.groups.items()}
@@ -0,0 +1,80 @@
+import os
+import json
+import argparse
+import numpy as np
+from lightgbm import LGBMRanker
+from app.api.v1.core.ranker import RANKERS, RANKER_MODEL_DIR
+
+# Offline training for the request-path rankers.
+#
+#   python -m app.api.v1.core.train_ranker --ranker web --input features.jsonl
+#
+# Input is the JSONL written when RANKER_FEATURE_LOG is set. A record may carry a
+# "labels" list (click or judgment grades, one per row); records without labels
+# fall back to the position-based labels the request path used to fit on.
+
+
+def synthetic_labels(n, label_scale):
+    if n < 2:
+        return np.zeros(n, dtype=int)
+    y = np.arange(n)[::-1] / (n - 1)
+    return (y * label_scale).astype(int)
+
+
+def load_training_data(path, name):
+    spec = RANKERS[name]
+    X, y, group = [], [], []
+    with open(path) as f:
+        for line in f:
+            line = line.strip()
+            if not line:
+                continue
+            record = json.loads(line)
+            if record.get("ranker") != name:
+                continue
+            features = record.get("features") or []
+            if not features or len(features[0]) != len(spec["features"]):
+                continue
+            labels = record.get("labels")
+            if labels is None or len(labels) != len(features):
+                labels = synthetic_labels(len(features), spec["label_scale"])
+            X.extend(features)
+            y.extend(int(label) for label in labels)
+            group.append(len(features))
+    return np.array(X), np.array(y), group
+
+
+def train(name, input_path, output_path, n_estimators=100):
+    X, y, group = load_training_data(input_path, name)
+    if not group:
+        raise ValueError(f"No {name} feature rows found in {input_path}")
+
+    model = LGBMRanker(
+        objective="lambdarank",
+        metric="ndcg",
+        boosting_type="dart",
+        n_estimators=n_estimators,
+        importance_type="gain",
+        max_position=max(int(y.max()) + 1, RANKERS[name]["label_scale"] + 1)
+    )
+    model.fit(X, y, group=group)
+
+    os.makedirs(os.path.dirname(output_path) or ".", exist_ok=True)
+    model.booster_.save_model(output_path)
+    print(f"Trained {name} ranker on {len(group)} queries / {len(y)} rows -> {output_path}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Train a persisted LightGBM ranker from logged feature vectors")
+    parser.add_argument("--ranker", choices=sorted(RANKERS), required=True)
+    parser.add_argument("--input", required=True, help="JSONL feature log")
+    parser.add_argument("--output", help="Model file (defaults to RANKER_MODEL_DIR/<ranker>.txt)")
+    parser.add_argument("--n-estimators", type=int, default=100)
+    args = parser.parse_args()
+
+    output_path = args.output or os.path.join(RANKER_MODEL_DIR, f"{args.ranker}.txt")
+    train(args.ranker, args.input, output_path, args.n_estimators)
+
+
+if __name__ == "__main__":
+    main()
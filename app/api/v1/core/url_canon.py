@@ -0,0 +1,61 @@
+from urllib.parse import urlsplit, urlunsplit, parse_qsl, urlencode
+
+TRACKING_PARAMS = {
+    "gclid", "dclid", "fbclid", "msclkid", "yclid", "igshid", "mc_cid", "mc_eid",
+    "ref", "ref_src", "_ga", "_gl", "spm", "srsltid",
+}
+TRACKING_PREFIXES = ("utm_",)
+
+
+def is_tracking_param(name):
+    name = name.lower()
+    return name in TRACKING_PARAMS or name.startswith(TRACKING_PREFIXES)
+
+
+def canonicalize_url(url):
+    # Key used to spot the same page across engines, not a URL to display
+    url = url.strip()
+    try:
+        parts = urlsplit(url)
+        host = (parts.hostname or "").lower()
+        port = parts.port
+    except ValueError:
+        return url
+    if not host:
+        return url
+
+    if host.startswith("www."):
+        host = host[4:]
+    if port and port not in (80, 443):
+        host = f"{host}:{port}"
+    scheme = parts.scheme.lower()
+    if scheme in ("http", "https"):
+        scheme = "https"
+    query = urlencode(sorted(
+        (name, value)
+        for name, value in parse_qsl(parts.query, keep_blank_values=True)
+        if not is_tracking_param(name)
+    ))
+    return urlunsplit((scheme, host, parts.path.rstrip("/"), query, ""))
+
+
+def merge_engine_results(seen, engine, results):
+    # seen maps canonical URL -> merged record and is shared across engines. A
+    # duplicate only adds its engine position to the record already kept; the
+    # records returned are the ones not seen before.
+    new_results = []
+    for index, result in enumerate(results):
+        position = result.get('position') or index + 1
+        link = result.get('link', '')
+        key = canonicalize_url(link) if link else None
+        merged = seen.get(key) if key else None
+        if merged is not None:
+            positions = merged['positions']
+            positions[engine] = min(positions.get(engine, position), position)
+            continue
+
+        merged = {**result, 'engine': engine, 'positions': {engine: position}}
+        if key:
+            seen[key] = merged
+        new_results.append(merged)
+    return new_results
@@ -1,5 +1,4 @@
 import os
-import re
 import json
 import asyncio
 import numpy as np
@@ -7,15 +6,22 @@ import pandas as pd
 from typing import List, Dict, Any, AsyncIterator
 from datetime import datetime, timedelta
 from dotenv import load_dotenv
-from serpapi import GoogleSearch, BingSearch
 from sklearn.feature_extraction.text import TfidfVectorizer
-from sklearn.metrics.pairwise import cosine_similarity
-from sklearn.preprocessing import MinMaxScaler
-from lightgbm import LGBMRanker
-from sentence_transformers import SentenceTransformer
 from urllib.parse import urlparse
-from functools import lru_cache
 from anthropic import AsyncAnthropicBedrock
+from app.api.v1.core.ranker import ranker
+from app.api.v1.core.serpapi_client import serpapi_client
+from app.api.v1.core.serp_cache import normalize_query
+from app.api.v1.core.singleflight import SingleFlight
+from app.api.v1.core.embeddings import compute_semantic_similarities
+from app.api.v1.core.url_canon import merge_engine_results
+from app.api.v1.web_crawler.search import SEARCH_ENGINES
+from app.api.v1.core.features import content_features, web_feature_matrix, minmax_columns
+from app.api.v1.core.near_dup import collapse_near_duplicates, log_removed_tokens
+from app.api.v1.core.circuit_breaker import bedrock_breaker
+from app.api.v1.core.json_stream import stream_json_events
+from app.api.v1.core.question_dedup import QuestionDeduplicator
+from app.api.v1.core.rank_executor import rank_executor
 
 load_dotenv()
 
@@ -26,89 +32,43 @@ SERPAPI_API_KEY = os.getenv('serpapi_api_key')
 AWS_ACCESS_KEY_ID = os.getenv("AWS_ACCESS_KEY_ID")
 AWS_SECRET_ACCESS_KEY = os.getenv("AWS_SECRET_ACCESS_KEY")
 AWS_REGION = os.getenv("AWS_REGION", "us-east-1")
+# Questions searched at once per SearchPro request
+SEARCHPRO_CONCURRENCY = int(os.getenv("SEARCHPRO_CONCURRENCY", "9"))
 
 anthropic_client = AsyncAnthropicBedrock(aws_access_key=AWS_ACCESS_KEY_ID,
                                             aws_secret_key=AWS_SECRET_ACCESS_KEY,
                                             aws_region=AWS_REGION)
 
-class SearchProcessor:
-    def __init__(self):
-        self.sentence_model = SentenceTransformer('all-MiniLM-L6-v2')
-
-    @lru_cache(maxsize=1000)
-    def get_domain_authority(self, domain: str) -> float:
-        return np.random.random()
-
-    @lru_cache(maxsize=1000)
-    def get_content_freshness(self, result: str) -> float:
-        return np.random.random()
+searchpro_flights = SingleFlight("searchpro_search")
+searchpro_plan_flights = SingleFlight("searchpro_plan")
 
+class SearchProcessor:
     def process_and_rank_results(self, all_results: Dict[str, List[Dict[str, Any]]], query: str) -> Dict[str, List[Dict[str, Any]]]:
+        seen = {}
         combined_results = []
         for engine, results in all_results.items():
-            for result in results:
-                result['engine'] = engine
-                combined_results.append(result)
+            combined_results.extend(merge_engine_results(seen, engine, results))
         
         if len(combined_results) < 2:
-            return {'organic_results': combined_results}
-        
-        query_embedding = self.sentence_model.encode([query])[0]
+            return {'organic_results': combined_results}, 0
         
-        features = []
-        for result in combined_results:
-            snippet = result.get('snippet', '')
-            title = result.get('title', '')
-            url = result.get('link', '')
-            
-            snippet_embedding = self.sentence_model.encode([snippet])[0]
-            title_embedding = self.sentence_model.encode([title])[0]
-            
-            semantic_similarity_snippet = cosine_similarity([query_embedding], [snippet_embedding])[0][0]
-            semantic_similarity_title = cosine_similarity([query_embedding], [title_embedding])[0][0]
-            
-            domain = urlparse(url).netloc
-            domain_authority = self.get_domain_authority(domain)
-            
-            features.append([
-                result.get('position', 0),
-                len(snippet),
-                snippet.count(query),
-                semantic_similarity_snippet,
-                semantic_similarity_title,
-                domain_authority,
-                self.get_content_freshness(json.dumps(result)),
-                int(engine == 'google'),
-                int(engine == 'bing'),
-                int(engine == 'duckduckgo')
-            ])
+        snippet_similarities, title_similarities = compute_semantic_similarities(query, combined_results)
         
-        X = np.array(features)
+        content = content_features(query, combined_results, snippet_similarities, title_similarities)
+        X = web_feature_matrix(combined_results, content, SEARCH_ENGINES)
         
         if X.shape[0] >= 2:
-            X = MinMaxScaler().fit_transform(X)
-            y = np.arange(len(features))[::-1]
-            y = MinMaxScaler().fit_transform(y.reshape(-1, 1)).ravel()
-            y = (y * 30).astype(int)
-            group = [len(features)]
-            
-            model = LGBMRanker(
-                objective="lambdarank",
-                metric="ndcg",
-                boosting_type="dart",
-                n_estimators=100,
-                importance_type="gain",
-                max_position=31
-            )
-            model.fit(X, y, group=group)
-            scores = model.predict(X)
+            X = minmax_columns(X)
+            scores = ranker.score("web", X, query, combined_results)
             sorted_indices = np.argsort(scores)[::-1]
             ranked_results = [combined_results[i] for i in sorted_indices]
-            diverse_results = self.ensure_diversity(ranked_results)
+            collapsed_results, removed_tokens = collapse_near_duplicates(ranked_results)
+            diverse_results = self.ensure_diversity(collapsed_results)
         else:
             diverse_results = combined_results
+            removed_tokens = 0
         
-        return {'organic_results': diverse_results}
+        return {'organic_results': diverse_results}, removed_tokens
 
     def ensure_diversity(self, results: List[Dict[str, Any]], diversity_threshold: float = 0.3) -> List[Dict[str, Any]]:
         diverse_results = []
@@ -143,21 +103,15 @@ class SearchProcessor:
                 'highlight': result.get('snippet_highlighted_words', ''),
                 'engine': result.get('engine', '')
             }
+            if result.get('alternate_sources'):
+                formatted_result['alternate_sources'] = result['alternate_sources']
             formatted_results.append(formatted_result)
         return formatted_results
     
-    def get_context_search(self, query: str):
-        params = {
-            "q": query, 
-            "engine": "google", 
-            "hl": "en", 
-            "gl": "us",
-            "num": "3",
-            "google_domain": "google.com", 
-            "api_key": serpapi_api_key,
-        }
-        search = GoogleSearch(params)
-        search_results = search.get_dict()
+    async def get_context_search(self, query: str):
+        search_results = await serpapi_client.search_engine(
+            "google", query, hl="en", gl="us", num="3", google_domain="google.com"
+        )
         formatted_results = self.format_search_results(search_results)
         context = '\n\n'.join([f"Source: {r['source']}\nTitle: {r['title']}\nSnippet: {r['snippet']}" for r in formatted_results])
         print("----------------------Context-----------------------")
@@ -165,32 +119,22 @@ class SearchProcessor:
         print("----------------------------------------")
         return context
 
-    def call_search_engines(self, query: str) -> Dict[str, Any]:
-        def search(engine: str, params: Dict[str, Any]) -> Dict[str, Any]:
+    async def call_search_engines(self, query: str) -> Dict[str, Any]:
+        return await searchpro_flights.do(normalize_query(query), self._call_search_engines, query)
+
+    async def _call_search_engines(self, query: str) -> Dict[str, Any]:
+        async def search(engine: str, params: Dict[str, Any]) -> Dict[str, Any]:
             try:
-                if engine == "google":
-                    search = GoogleSearch(params)
-                elif engine == "bing":
-                    search = BingSearch(params)
-                else:
-                    search = GoogleSearch(params)  # DuckDuckGo uses GoogleSearch
-                return search.get_dict()
+                return await serpapi_client.search_engine(engine, query, **params)
             except Exception as e:
                 print(f"Error in {engine} search: {str(e)}")
                 return {"organic_results": []}
 
-        results = [
-            search("google", {
-                "q": query, "engine": "google", "hl": "en", "gl": "us",
-                "google_domain": "google.com", "api_key": serpapi_api_key,
-            }),
-            search("bing", {
-                "q": query, "engine": "bing", "cc": "US", "api_key": serpapi_api_key,
-            }),
-            search("duckduckgo", {
-                "q": query, "engine": "duckduckgo", "api_key": serpapi_api_key,
-            })
-        ]
+        results = await asyncio.gather(
+            search("google", {"hl": "en", "gl": "us", "google_domain": "google.com"}),
+            search("bing", {"cc": "US"}),
+            search("duckduckgo", {})
+        )
         
         all_results = {
             "google": results[0].get('organic_results', []),
@@ -198,9 +142,10 @@ class SearchProcessor:
             "duckduckgo": results[2].get('organic_results', [])
         }
         
-        search_results = self.process_and_rank_results(all_results, query)
+        # The removed token count travels with the results so the request logs one total
+        search_results, removed_tokens = await rank_executor.run(self.process_and_rank_results, all_results, query)
         formatted_results = self.format_search_results(search_results)
-        return formatted_results
+        return formatted_results, removed_tokens
     
     def extract_all_questions(self, results):
         all_questions = []
@@ -212,18 +157,22 @@ class SearchProcessor:
     
     def merge_list_and_dict(self, data_list, data_dict):
         merged_result = {}
+        removed_tokens = 0
         
         for i, (key, questions) in enumerate(data_dict.items()):
             merged_key = f"Section_{i+1}"
             start_index = i * 9  # Each section has 3 sources
             end_index = start_index + 9
+            # Questions in a section often surface the same story, so collapse across them too
+            sources, section_tokens = collapse_near_duplicates(data_list[start_index:end_index])
+            removed_tokens += section_tokens
             merged_result[merged_key] = {
                 "research_area": key,
                 "questions": questions,
-                "sources": data_list[start_index:end_index] if start_index < len(data_list) else []
+                "sources": sources
             }
         
-        return json.dumps(merged_result, indent=2)
+        return json.dumps(merged_result, indent=2), removed_tokens
     
     def extract_source(self, data):
         sources = []
@@ -235,9 +184,13 @@ class SearchProcessor:
         return "\n".join(sources)
 
 async def generate_queries_and_sections(query):
+    # Concurrent identical plans share one Claude planning call and its fan-out
+    return await searchpro_plan_flights.do(normalize_query(query), _generate_queries_and_sections, query)
+
+async def _generate_queries_and_sections(query):
     search_processor = SearchProcessor()
 
-    context = search_processor.get_context_search(query)
+    context = await search_processor.get_context_search(query)
 
     system_message = """
         You are a search engine specialist with expertise in crafting precise, search engine-friendly queries to retrieve the most relevant and insightful information on any given topic. 
@@ -287,33 +240,52 @@ async def generate_queries_and_sections(query):
     Internet Search Results:
     {context}
     """
-    message = await anthropic_client.messages.create(
-        model="anthropic.claude-3-5-sonnet-20240620-v1:0",
-        max_tokens=500,
-        system=system_message,
-        messages=[
-                {"role": "user", "content": user_message}
-        ]
-    )
-    json_match = re.search(r'\{[\s\S]*?\}', message.content[0].text)
+    semaphore = asyncio.Semaphore(SEARCHPRO_CONCURRENCY)
+
+    async def search_question(question):
+        async with semaphore:
+            return await search_processor.call_search_engines(question)
+
+    # Each question is searched as soon as its string closes in the planner stream,
+    # unless it paraphrases an earlier question whose search it then shares
+    dedup = QuestionDeduplicator()
+    searches = []
+    generated_json_queries = None
+    try:
+        async for path, value in stream_json_events(
+            anthropic_client,
+            model="anthropic.claude-3-5-sonnet-20240620-v1:0",
+            max_tokens=500,
+            system=system_message,
+            messages=[
+                    {"role": "user", "content": user_message}
+            ]
+        ):
+            if len(path) == 2 and isinstance(value, str):
+                searches.append(dedup.schedule(value, search_question))
+            elif not path:
+                generated_json_queries = value
+    except BaseException:
+        for search in searches:
+            search.cancel()
+        raise
+
     print("----------------------- Extracted JSON Response -------------------------------")
-    print(json_match.group(0))
+    print(json.dumps(generated_json_queries))
     print("-------------------------------------------------------")
     print("----------------------- Extracted Questions -------------------------------")
-    generated_json_queries = json.loads(json_match.group(0))
-    extracted_questions = search_processor.extract_all_questions(generated_json_queries)
-    print(extracted_questions)
+    print(search_processor.extract_all_questions(generated_json_queries))
     print("-------------------------------------------------------")
     print("--------------------------------Search Process from SERP -----------------------")
-    all_results = []
-    for questions in extracted_questions:
-        results = search_processor.call_search_engines(questions)
-        all_results.extend(results)
+    # Dispatch order is question order, so merge_list_and_dict slices the same sources per section
+    question_results = await asyncio.gather(*searches)
+    all_results = [result for results, _ in question_results for result in results]
 
-    merged_data = search_processor.merge_list_and_dict(all_results, generated_json_queries)
+    merged_data, section_tokens = search_processor.merge_list_and_dict(all_results, generated_json_queries)
+    log_removed_tokens("searchpro", section_tokens + sum(removed_tokens for _, removed_tokens in question_results))
     parsed_data = json.loads(merged_data)
 
-    return parsed_data
+    return parsed_data, dedup.searches_saved
 
 async def vexoo_claude_pro_search(query, data):
     search_processor = SearchProcessor()
@@ -342,7 +314,7 @@ async def vexoo_claude_pro_search(query, data):
 
     Based on these search results and your extensive knowledge, provide an exceptionally detailed, comprehensive, and insightful response to the query. Your answer should be characterized by its depth, precision, and attention to nuanced details. Ensure your response is directly relevant, incorporates the latest information, and is tailored to the specific nature and depth of the question. If the query is coding-related, include detailed code examples with explanations. Anticipate and address potential follow-up questions in your response. Remember to include a detailed "Sources" section at the end of your response, with numbered references and URLs for further reading."""
 
-    async with anthropic_client.messages.stream(
+    async with bedrock_breaker.guard(anthropic_client.messages.stream,
         model="anthropic.claude-3-5-sonnet-20240620-v1:0",
         max_tokens=2046,
         system=system_prompt,
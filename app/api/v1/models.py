@@ -15,6 +15,8 @@ class LLMSummaryArgs(BaseModel):
 
 class SerpArgs(BaseModel):
     query: str
+    ranking: Optional[str] = None
+    plan_id: Optional[str] = None
 
 class LLMSummaryRequest(BaseModel):
     input: LLMSummaryArgs
@@ -1,151 +1,193 @@
 import os
-import re
+import time
 import asyncio
 import numpy as np
 from datetime import datetime
 from dotenv import load_dotenv
-from aiohttp import ClientSession
-from sklearn.metrics.pairwise import cosine_similarity
-from sklearn.preprocessing import MinMaxScaler
-from lightgbm import LGBMRanker
-from sentence_transformers import SentenceTransformer
 from urllib.parse import urlparse
-from serpapi import GoogleSearch
+from app.api.v1.core.ranker import ranker
+from app.api.v1.core.serpapi_client import serpapi_client
+from app.api.v1.core.serp_cache import normalize_query
+from app.api.v1.core.singleflight import SingleFlight
+from app.api.v1.core.url_canon import merge_engine_results
+from app.api.v1.core.embeddings import compute_semantic_similarities
+from app.api.v1.core.rank_executor import rank_executor
+from app.api.v1.core.features import content_features, web_feature_matrix, minmax_columns
+from app.api.v1.core.near_dup import collapse_near_duplicates, log_removed_tokens
 
 load_dotenv()
 
-# Initialize SentenceTransformer model globally
-sentence_model = SentenceTransformer('all-MiniLM-L6-v2')
+web_search_flights = SingleFlight("web_search")
 
-# Pre-compute TLD scores
-TLD_SCORES = {
-    'com': 0.7, 'org': 0.6, 'net': 0.5, 'edu': 0.8, 'gov': 0.9,
-    'io': 0.4, 'co': 0.5, 'ai': 0.3, 'app': 0.3
-}
+SEARCH_ENGINES = ["google", "bing", "duckduckgo"]
+SEARCH_ENGINE_TIMEOUT = float(os.getenv("SEARCH_ENGINE_TIMEOUT", "8"))
+SEARCH_DEADLINE = float(os.getenv("SEARCH_DEADLINE", "10"))
+# Rank once this many engines have answered and drop the stragglers
+SEARCH_QUORUM = int(os.getenv("SEARCH_QUORUM", str(len(SEARCH_ENGINES))))
+# Send a second request to an engine that has not answered after this many seconds (0 disables)
+SEARCH_HEDGE_AFTER = float(os.getenv("SEARCH_HEDGE_AFTER", "0"))
 
-def get_domain_authority(domain):
-    tld = domain.split('.')[-1]
-    base_score = TLD_SCORES.get(tld, 0.3)
-    length_factor = max(0, (20 - len(domain)) / 20)
-    return min(1.0, base_score + (length_factor * 0.3))
+# rrf: reciprocal rank fusion over engine positions, no model calls
+# embed: query/result cosine similarity only
+# learned: the LightGBM ranker over the full feature set
+RANKING_STRATEGIES = ("rrf", "embed", "learned")
+RANKING_STRATEGY = os.getenv("RANKING_STRATEGY", "learned")
+RRF_K = int(os.getenv("RRF_K", "60"))
 
-def get_content_freshness(result):
-    current_time = datetime.now()
-    date_str = result.get('date') or result.get('snippet', '')
-    
-    date_patterns = [
-        r'\b(\d{1,2}\s+(?:Jan|Feb|Mar|Apr|May|Jun|Jul|Aug|Sep|Oct|Nov|Dec)\s+\d{4})\b',
-        r'\b(\d{4}-\d{2}-\d{2})\b'
-    ]
-    
-    for pattern in date_patterns:
-        match = re.search(pattern, date_str)
-        if match:
-            try:
-                date = datetime.strptime(match.group(1), '%d %b %Y')
-            except ValueError:
-                try:
-                    date = datetime.strptime(match.group(1), '%Y-%m-%d')
-                except ValueError:
-                    continue
-            
-            days_old = (current_time - date).days
-            return max(0, 1 - (days_old / 365))
-    
-    position = result.get('position', 0)
-    return max(0, 1 - (position / 20))
+async def fetch_search_results(params):
+    return await serpapi_client.search(params)
 
-async def fetch_search_results(session, params):
-    async with session.get('https://serpapi.com/search', params=params) as response:
-        return await response.json()
+async def fetch_engine_results(engine, params):
+    start = time.perf_counter()
+    report = {"engine": engine, "status": "ok", "hedged": False, "results": 0}
+    results = {}
+    try:
+        results, report["hedged"] = await asyncio.wait_for(
+            serpapi_client.search_hedged({**params, "engine": engine}, SEARCH_HEDGE_AFTER),
+            SEARCH_ENGINE_TIMEOUT
+        )
+        if "error" in results:
+            report["status"] = "error"
+    except asyncio.TimeoutError:
+        report["status"] = "timeout"
+    except Exception as e:
+        print(f"Error in {engine} search: {str(e)}")
+        report["status"] = "error"
+    report["latency_ms"] = round((time.perf_counter() - start) * 1000, 1)
+    organic_results = results.get('organic_results', []) if report["status"] == "ok" else []
+    report["results"] = len(organic_results)
+    return report, organic_results
 
-async def call_search_engines(query):
-    serpapi_api_key = os.getenv('serpapi_api_key')
-    
+def resolve_ranking_strategy(ranking=None):
+    strategy = ranking or RANKING_STRATEGY
+    if strategy not in RANKING_STRATEGIES:
+        raise ValueError(f"Unknown ranking strategy {strategy!r}, expected one of {', '.join(RANKING_STRATEGIES)}")
+    return strategy
+
+async def call_search_engines(query, ranking=None):
+    strategy = resolve_ranking_strategy(ranking)
+    # Identical concurrent searches share one fetch + ranking pass
+    return await web_search_flights.do((normalize_query(query), strategy), search_and_rank, query, strategy)
+
+async def search_and_rank(query, strategy=RANKING_STRATEGY):
     params = {
-        "api_key": serpapi_api_key,
         "q": query,
         "hl": "en",
         "gl": "us",
     }
     
-    async with ClientSession() as session:
-        tasks = [
-            fetch_search_results(session, {**params, "engine": engine})
-            for engine in ["google", "bing", "duckduckgo"]
-        ]
-        results = await asyncio.gather(*tasks)
-    
-    all_results = {
-        engine: result.get('organic_results', [])
-        for engine, result in zip(["google", "bing", "duckduckgo"], results)
-    }
-    
-    return process_and_rank_results(all_results, query)
+    loop = asyncio.get_running_loop()
+    deadline = loop.time() + SEARCH_DEADLINE
+    quorum = min(SEARCH_QUORUM, len(SEARCH_ENGINES))
+    pending = {asyncio.ensure_future(fetch_engine_results(engine, params)) for engine in SEARCH_ENGINES}
 
-def process_and_rank_results(all_results, query):
-    combined_results = [
-        {**result, 'engine': engine}
-        for engine, results in all_results.items()
-        for result in results
+    # Each engine is deduplicated against the engines already in, then embedded
+    # and featurized as soon as it lands, overlapping with the wait for the rest
+    seen = {}
+    extractions = {}
+    reports = {}
+    answered = 0
+    while pending and answered < quorum:
+        timeout = deadline - loop.time()
+        if timeout <= 0:
+            break
+        done, pending = await asyncio.wait(pending, timeout=timeout, return_when=asyncio.FIRST_COMPLETED)
+        for task in done:
+            report, organic_results = task.result()
+            reports[report["engine"]] = report
+            if report["status"] != "ok":
+                continue
+            # Counts toward quorum even when it only repeated pages already in
+            answered += 1
+            new_results = merge_engine_results(seen, report["engine"], organic_results)
+            report["duplicates"] = len(organic_results) - len(new_results)
+            if new_results:
+                # The pool only hands back features; positions from engines that land
+                # later are merged into these objects, so ranking must read them, not copies
+                extractions[report["engine"]] = (
+                    new_results,
+                    asyncio.ensure_future(extract_engine_features(query, new_results, strategy))
+                )
+
+    for task in pending:
+        task.cancel()
+    engines = [
+        reports.get(engine, {"engine": engine, "status": "dropped", "hedged": False, "results": 0})
+        for engine in SEARCH_ENGINES
     ]
+
+    if not extractions:
+        return {'organic_results': [], 'engines': engines}
+
+    # Merge in engine order so ties rank the same regardless of arrival order
+    engine_results = [extractions[engine] for engine in SEARCH_ENGINES if engine in extractions]
+    futures = [future for _, future in engine_results]
+    try:
+        features = await asyncio.gather(*futures)
+    except BaseException:
+        for future in futures:
+            future.cancel()
+        raise
+    extracted = [(results, engine_features) for (results, _), engine_features in zip(engine_results, features)]
+    ranked, removed_tokens = await rank_executor.run(rank_web_features, query, extracted, strategy)
+    log_removed_tokens("web", removed_tokens)
+    return {**ranked, 'engines': engines}
+
+async def extract_engine_features(query, results, strategy):
+    if strategy == "rrf":
+        return None
+    return await rank_executor.run(extract_web_features, query, results)
+
+def process_and_rank_results(all_results, query, ranking=None):
+    strategy = resolve_ranking_strategy(ranking)
+    seen = {}
+    extracted = []
+    for engine, results in all_results.items():
+        new_results = merge_engine_results(seen, engine, results)
+        if new_results:
+            extracted.append((new_results, None if strategy == "rrf" else extract_web_features(query, new_results)))
+    if not extracted:
+        return {'organic_results': []}
+    ranked, removed_tokens = rank_web_features(query, extracted, strategy)
+    log_removed_tokens("web", removed_tokens)
+    return ranked
+
+def rrf_scores(results, k=RRF_K):
+    return np.array([
+        sum(1 / (k + position) for position in result['positions'].values())
+        for result in results
+    ])
+
+def extract_web_features(query, results):
+    # Raw, unscaled content features; engine positions are added in rank_web_features
+    # since engines that land later can still add to them
+    snippet_similarities, title_similarities = compute_semantic_similarities(query, results)
+    return content_features(query, results, snippet_similarities, title_similarities)
+
+def rank_web_features(query, extracted, strategy="learned"):
+    # Scaling spans all engines, so it waits for every engine's features
+    combined_results = [result for engine_results, _ in extracted for result in engine_results]
     
-    query_embedding = sentence_model.encode([query])[0]
-    
-    features = []
-    for result in combined_results:
-        snippet = result.get('snippet', '')
-        title = result.get('title', '')
-        url = result.get('link', '')
-        
-        snippet_embedding = sentence_model.encode([snippet])[0]
-        title_embedding = sentence_model.encode([title])[0]
-        
-        semantic_similarity_snippet = cosine_similarity([query_embedding], [snippet_embedding])[0][0]
-        semantic_similarity_title = cosine_similarity([query_embedding], [title_embedding])[0][0]
-        
-        domain = urlparse(url).netloc
-        domain_authority = get_domain_authority(domain)
-        
-        features.append([
-            result.get('position', 0),
-            len(snippet),
-            snippet.count(query),
-            semantic_similarity_snippet,
-            semantic_similarity_title,
-            domain_authority,
-            get_content_freshness(result),
-            int(result['engine'] == 'google'),
-            int(result['engine'] == 'bing'),
-            int(result['engine'] == 'duckduckgo')
-        ])
-    
-    X = MinMaxScaler().fit_transform(np.array(features))
-    
-    y = np.arange(len(features))[::-1]
-    y = MinMaxScaler().fit_transform(y.reshape(-1, 1)).ravel()
-    y = (y * 30).astype(int)
-    
-    group = [len(features)]
-    
-    model = LGBMRanker(
-        objective="lambdarank",
-        metric="ndcg",
-        boosting_type="dart",
-        n_estimators=100,
-        importance_type="gain",
-        max_position=31
-    )
-    model.fit(X, y, group=group)
-    
-    scores = model.predict(X)
+    if strategy == "rrf":
+        scores = rrf_scores(combined_results)
+    else:
+        content = np.vstack([engine_features for _, engine_features in extracted])
+        if strategy == "embed":
+            # semantic_similarity_snippet + semantic_similarity_title
+            scores = content[:, 2] + content[:, 3]
+        else:
+            X = minmax_columns(web_feature_matrix(combined_results, content, SEARCH_ENGINES))
+            scores = ranker.score("web", X, query, combined_results)
     
-    sorted_indices = np.argsort(scores)[::-1]
+    # Stable, so ties keep engine order
+    sorted_indices = np.argsort(-scores, kind="stable")
     ranked_results = [combined_results[i] for i in sorted_indices]
     
-    diverse_results = ensure_diversity(ranked_results)
+    # Runs in the pool, so the removed token count goes back for the caller to log
+    collapsed_results, removed_tokens = collapse_near_duplicates(ranked_results)
+    diverse_results = ensure_diversity(collapsed_results)
     
-    return {'organic_results': diverse_results}
+    return {'organic_results': diverse_results}, removed_tokens
 
 def ensure_diversity(results, diversity_threshold=0.3):
     diverse_results = []
@@ -185,19 +227,12 @@ def format_search_results(search_data):
     return formatted_results
 
 async def fetch_google_scholar_results(query, num_results=40, sort_by='date'):
-    serpapi_api_key = os.getenv('serpapi_api_key')
-    
-    params = {
-        "api_key": serpapi_api_key,
-        "engine": "google_scholar",
-        "q": query,
-        "num": num_results,
-        "sort": sort_by,
-        "as_ylo": datetime.now().year - 5
-    }
-    
-    search = GoogleSearch(params)
-    results = search.get_dict()
+    results = await serpapi_client.search_engine(
+        "google_scholar", query,
+        num=num_results,
+        sort=sort_by,
+        as_ylo=datetime.now().year - 5
+    )
     return results.get("organic_results", [])
 
 async def process_and_rank_scholar_results(all_results, query):
@@ -215,60 +250,27 @@ async def process_and_rank_scholar_results(all_results, query):
     else:
         raise ValueError("Invalid results format")
 
-    query_embedding = sentence_model.encode([query])[0]
-    
-    features = []
-    for result in combined_results:
-        snippet = result.get('snippet', '')
-        title = result.get('title', '')
-        url = result.get('link', '')
-        
-        snippet_embedding = sentence_model.encode([snippet])[0]
-        title_embedding = sentence_model.encode([title])[0]
-        
-        semantic_similarity_snippet = cosine_similarity([query_embedding], [snippet_embedding])[0][0]
-        semantic_similarity_title = cosine_similarity([query_embedding], [title_embedding])[0][0]
-        
-        domain = urlparse(url).netloc
-        domain_authority = get_domain_authority(domain)
-        
-        citation_count = int(result.get('inline_links', {}).get('cited_by', {}).get('total', 0))
-        
-        features.append([
-            result.get('position', 0),
-            len(snippet),
-            snippet.count(query),
-            semantic_similarity_snippet,
-            semantic_similarity_title,
-            domain_authority,
-            get_content_freshness(result),
-            np.log1p(citation_count),
-            int(result['engine'] == 'google'),
-            int(result['engine'] == 'bing'),
-            int(result['engine'] == 'duckduckgo'),
-            int(result['engine'] == 'google_scholar')
-        ])
-    
-    X = np.array(features)
-    X = MinMaxScaler().fit_transform(X)
-    
-    y = np.arange(len(features))[::-1]
-    y = MinMaxScaler().fit_transform(y.reshape(-1, 1)).ravel()
-    y = (y * 30).astype(int)
+    return await rank_executor.run(rank_scholar_results, combined_results, query)
+
+def rank_scholar_results(combined_results, query):
+    snippet_similarities, title_similarities = compute_semantic_similarities(query, combined_results)
     
-    group = [len(features)]
+    positions = np.array([result.get('position', 0) for result in combined_results], dtype=np.float64)
+    citations = np.array([
+        int(result.get('inline_links', {}).get('cited_by', {}).get('total', 0))
+        for result in combined_results
+    ], dtype=np.float64)
+    engines = np.array([result['engine'] for result in combined_results])
     
-    model = LGBMRanker(
-        objective="lambdarank",
-        metric="ndcg",
-        boosting_type="dart",
-        n_estimators=100,
-        importance_type="gain",
-        max_position=31
-    )
-    model.fit(X, y, group=group)
+    X = np.column_stack([
+        positions,
+        content_features(query, combined_results, snippet_similarities, title_similarities),
+        np.log1p(citations),
+        *(engines == engine for engine in ('google', 'bing', 'duckduckgo', 'google_scholar'))
+    ])
+    X = minmax_columns(X)
     
-    scores = model.predict(X)
+    scores = ranker.score("scholar", X, query, combined_results)
     
     sorted_indices = np.argsort(scores)[::-1]
     ranked_results = [combined_results[i] for i in sorted_indices]
@@ -1,8 +1,38 @@
+import asyncio
+from contextlib import asynccontextmanager
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 from app.api.api_router import vexo_api_router
+from app.api.v1.core.ranker import ranker
+from app.api.v1.core.model_registry import model_registry, SENTENCE_MODEL_NAME
+from app.api.v1.core.embedding_cache import embedding_cache
+from app.api.v1.core.embedding_batcher import embedding_batcher
+from app.api.v1.core.serpapi_client import serpapi_client
+from app.api.v1.core.serp_cache import serp_cache
+from app.api.v1.core.serp_scheduler import SerpLaneMiddleware
+from app.api.v1.core.rank_executor import rank_executor
+from app.api.v1.core.domain_authority import domain_authority_index
 
-app = FastAPI(title="Vexoo API Documentation", version="1.1.0")
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Load persisted ranking models and shared encoders once per worker
+    ranker.load()
+    domain_authority_index.load()
+    await asyncio.to_thread(model_registry.preload, [SENTENCE_MODEL_NAME])
+    app.state.model_registry = model_registry
+    embedding_batcher.start()
+    await serpapi_client.start()
+    yield
+    await serpapi_client.close()
+    serp_cache.close()
+    rank_executor.shutdown()
+    embedding_batcher.stop()
+    embedding_cache.close()
+    model_registry.clear()
+
+
+app = FastAPI(title="Vexoo API Documentation", version="1.1.0", lifespan=lifespan)
 
 # Add CORS middleware
 app.add_middleware(
@@ -13,6 +43,9 @@ app.add_middleware(
     allow_headers=["*"],  # Allows all headers
 )
 
+# Assign SerpAPI scheduler lanes per endpoint
+app.add_middleware(SerpLaneMiddleware)
+
 # Include the API routes
 app.include_router(vexo_api_router, prefix="/api/v1", tags=["Pre-Beta Version 1.1.0"])
 
@@ -0,0 +1,118 @@
+import os
+import sys
+import json
+import time
+import random
+import argparse
+import subprocess
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# Compares the torch and ONNX int8 embedding backends on SERP-sized batches.
+#
+#   python benchmarks/bench_embedding_backends.py
+#   python benchmarks/bench_embedding_backends.py --payloads recorded/   # SerpAPI JSON dumps
+#
+# Each backend runs in its own process so RSS reflects that backend alone.
+
+WORDS = (
+    "the of and to in for on with by from latest news report analysis market energy policy "
+    "research study data model results growth price company government climate technology "
+    "health security update review experts said according year new global first million"
+).split()
+
+# Web ranking embeds 1 query + ~30 titles + ~30 snippets; Pro fan-out multiplies that.
+BATCH_SIZES = [1, 16, 61, 256]
+
+
+def synthetic_texts(n, seed=0):
+    rng = random.Random(seed)
+    texts = []
+    for i in range(n):
+        length = rng.randint(8, 14) if i % 2 else rng.randint(25, 45)
+        texts.append(" ".join(rng.choice(WORDS) for _ in range(length)).capitalize() + ".")
+    return texts
+
+
+def recorded_texts(directory):
+    texts = []
+    for name in sorted(os.listdir(directory)):
+        if not name.endswith(".json"):
+            continue
+        with open(os.path.join(directory, name)) as f:
+            payload = json.load(f)
+        for key in ("organic_results", "news_results"):
+            for result in payload.get(key, []):
+                texts.extend(t for t in (result.get("title"), result.get("snippet")) if t)
+    return texts
+
+
+def run_worker(backend, texts, repeats):
+    from app.api.v1.core.model_registry import current_rss_bytes, SENTENCE_MODEL_NAME
+    from app.api.v1.core.embedding_backends import load_backend
+
+    rss_start = current_rss_bytes()
+    start = time.perf_counter()
+    model = load_backend(SENTENCE_MODEL_NAME, backend)
+    load_seconds = time.perf_counter() - start
+    model.encode(texts[:8])
+
+    batches = {}
+    for size in BATCH_SIZES:
+        batch = (texts * (size // max(len(texts), 1) + 1))[:size]
+        timings = []
+        for _ in range(repeats):
+            start = time.perf_counter()
+            model.encode(batch)
+            timings.append(time.perf_counter() - start)
+        timings = np.array(timings) * 1000
+        batches[size] = {
+            "p50_ms": round(float(np.percentile(timings, 50)), 2),
+            "p95_ms": round(float(np.percentile(timings, 95)), 2),
+            "texts_per_s": round(size / (np.median(timings) / 1000), 1),
+        }
+
+    return {
+        "backend": backend,
+        "load_seconds": round(load_seconds, 2),
+        "rss_mib": round(current_rss_bytes() / 2**20, 1),
+        "rss_delta_mib": round((current_rss_bytes() - rss_start) / 2**20, 1),
+        "batches": batches,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--backends", default="torch,onnx")
+    parser.add_argument("--payloads", help="Directory of recorded SerpAPI JSON responses")
+    parser.add_argument("--repeats", type=int, default=20)
+    parser.add_argument("--worker", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    texts = recorded_texts(args.payloads) if args.payloads else synthetic_texts(512)
+
+    if args.worker:
+        print(json.dumps(run_worker(args.worker, texts, args.repeats)))
+        return
+
+    reports = []
+    for backend in args.backends.split(","):
+        command = [sys.executable, __file__, "--worker", backend, "--repeats", str(args.repeats)]
+        if args.payloads:
+            command += ["--payloads", args.payloads]
+        proc = subprocess.run(command, capture_output=True, text=True)
+        if proc.returncode != 0:
+            print(f"{backend}: failed\n{proc.stderr.strip()}")
+            continue
+        reports.append(json.loads(proc.stdout.strip().splitlines()[-1]))
+
+    for report in reports:
+        print(f"\n{report['backend']}: load {report['load_seconds']}s, RSS {report['rss_mib']} MiB (+{report['rss_delta_mib']} MiB for the model)")
+        print(f"{'batch':>6} {'p50 ms':>9} {'p95 ms':>9} {'texts/s':>9}")
+        for size, stats in report["batches"].items():
+            print(f"{size:>6} {stats['p50_ms']:>9} {stats['p95_ms']:>9} {stats['texts_per_s']:>9}")
+
+
+if __name__ == "__main__":
+    main()
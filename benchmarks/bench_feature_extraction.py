@@ -0,0 +1,146 @@
+import os
+import re
+import sys
+import time
+import random
+import argparse
+from datetime import datetime
+from urllib.parse import urlparse
+import numpy as np
+from sklearn.preprocessing import MinMaxScaler
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# Times building the scaled web feature matrix, the per-row loop it replaced
+# against the batched extractor in app/api/v1/core/features.py.
+#
+#   python benchmarks/bench_feature_extraction.py
+#   python benchmarks/bench_feature_extraction.py --repeats 500
+#
+# Similarities are precomputed and shared, so only feature building and scaling are timed.
+
+ENGINES = ["google", "bing", "duckduckgo"]
+SIZES = [10, 30, 100, 1000]
+WORDS = (
+    "energy storage battery grid solar wind policy market price report research analysis "
+    "lithium supply demand climate emissions carbon utility investment technology review"
+).split()
+DOMAINS = ["example.com", "energy.gov", "news.org", "research.edu", "startup.io", "longer-domain-name.net", "site.ai"]
+MONTHS = ["Jan", "Feb", "Mar", "Apr", "May", "Jun", "Jul", "Aug", "Sep", "Oct", "Nov", "Dec"]
+
+
+def synthetic_results(n, seed=0):
+    rng = random.Random(seed)
+    results = []
+    for i in range(n):
+        snippet = " ".join(rng.choice(WORDS) for _ in range(rng.randint(20, 35)))
+        # Roughly how often SerpAPI snippets carry a date
+        if rng.random() < 0.3:
+            snippet = f"{rng.randint(1, 28)} {rng.choice(MONTHS)} {rng.randint(2019, 2024)} ... {snippet}"
+        elif rng.random() < 0.1:
+            snippet = f"{rng.randint(2019, 2024)}-{rng.randint(1, 12):02d}-{rng.randint(1, 28):02d} {snippet}"
+        engines = rng.sample(ENGINES, rng.randint(1, 3))
+        results.append({
+            "link": f"https://www.{rng.choice(DOMAINS)}/{rng.choice(WORDS)}/{i}",
+            "title": " ".join(rng.choice(WORDS) for _ in range(8)),
+            "snippet": snippet,
+            "position": i % 10 + 1,
+            "positions": {engine: rng.randint(1, 10) for engine in engines},
+        })
+    return results
+
+
+# The per-row extractor as it was before features.py
+TLD_SCORES = {
+    'com': 0.7, 'org': 0.6, 'net': 0.5, 'edu': 0.8, 'gov': 0.9,
+    'io': 0.4, 'co': 0.5, 'ai': 0.3, 'app': 0.3
+}
+
+
+def legacy_domain_authority(domain):
+    tld = domain.split('.')[-1]
+    base_score = TLD_SCORES.get(tld, 0.3)
+    length_factor = max(0, (20 - len(domain)) / 20)
+    return min(1.0, base_score + (length_factor * 0.3))
+
+
+def legacy_freshness(result):
+    current_time = datetime.now()
+    date_str = result.get('date') or result.get('snippet', '')
+    date_patterns = [
+        r'\b(\d{1,2}\s+(?:Jan|Feb|Mar|Apr|May|Jun|Jul|Aug|Sep|Oct|Nov|Dec)\s+\d{4})\b',
+        r'\b(\d{4}-\d{2}-\d{2})\b'
+    ]
+    for pattern in date_patterns:
+        match = re.search(pattern, date_str)
+        if match:
+            try:
+                date = datetime.strptime(match.group(1), '%d %b %Y')
+            except ValueError:
+                try:
+                    date = datetime.strptime(match.group(1), '%Y-%m-%d')
+                except ValueError:
+                    continue
+            days_old = (current_time - date).days
+            return max(0, 1 - (days_old / 365))
+    position = result.get('position', 0)
+    return max(0, 1 - (position / 20))
+
+
+def legacy_matrix(query, results, snippet_similarities, title_similarities):
+    features = []
+    for result, semantic_similarity_snippet, semantic_similarity_title in zip(results, snippet_similarities, title_similarities):
+        snippet = result.get('snippet', '')
+        domain = urlparse(result.get('link', '')).netloc
+        positions = result['positions']
+        features.append(
+            [1 / positions[engine] if engine in positions else 0 for engine in ENGINES] + [
+                len(snippet),
+                snippet.count(query),
+                semantic_similarity_snippet,
+                semantic_similarity_title,
+                legacy_domain_authority(domain),
+                legacy_freshness(result),
+                len(positions)
+            ]
+        )
+    return MinMaxScaler().fit_transform(np.array(features))
+
+
+def batched_matrix(query, results, snippet_similarities, title_similarities):
+    from app.api.v1.core.features import content_features, web_feature_matrix, minmax_columns
+    content = content_features(query, results, snippet_similarities, title_similarities)
+    return minmax_columns(web_feature_matrix(results, content, ENGINES))
+
+
+def time_it(fn, repeats, *args):
+    timings = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        fn(*args)
+        timings.append(time.perf_counter() - start)
+    return np.array(timings) * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--repeats", type=int, default=200)
+    args = parser.parse_args()
+
+    query = "energy storage"
+    print(f"{'results':>8} {'legacy p50 ms':>14} {'batched p50 ms':>15} {'speedup':>8} {'max diff':>9}")
+    for size in SIZES:
+        results = synthetic_results(size)
+        rng = np.random.default_rng(size)
+        snippet_similarities, title_similarities = rng.random(size), rng.random(size)
+        inputs = (query, results, snippet_similarities, title_similarities)
+
+        # Warm up, and check both builders agree before timing them
+        diff = np.abs(legacy_matrix(*inputs) - batched_matrix(*inputs)).max()
+        legacy = np.percentile(time_it(legacy_matrix, args.repeats, *inputs), 50)
+        batched = np.percentile(time_it(batched_matrix, args.repeats, *inputs), 50)
+        print(f"{size:>8} {legacy:>14.3f} {batched:>15.3f} {legacy / batched:>7.1f}x {diff:>9.1e}")
+
+
+if __name__ == "__main__":
+    main()
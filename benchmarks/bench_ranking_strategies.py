@@ -0,0 +1,133 @@
+import os
+import sys
+import json
+import time
+import random
+import argparse
+from collections import defaultdict
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# Compares the web ranking strategies on latency and agreement with the learned ranker.
+#
+#   python benchmarks/bench_ranking_strategies.py
+#   python benchmarks/bench_ranking_strategies.py --payloads recorded/   # SerpAPI JSON dumps
+#   python benchmarks/bench_ranking_strategies.py --cold                  # empty the embedding cache between runs
+#
+# Recorded payloads are grouped into one query per search_parameters.q, with one
+# file per engine.
+
+ENGINES = ["google", "bing", "duckduckgo"]
+WORDS = (
+    "energy storage battery grid solar wind policy market price report research analysis "
+    "lithium supply demand climate emissions carbon utility investment technology review"
+).split()
+
+
+def recorded_queries(directory):
+    queries = defaultdict(dict)
+    for name in sorted(os.listdir(directory)):
+        if not name.endswith(".json"):
+            continue
+        with open(os.path.join(directory, name)) as f:
+            payload = json.load(f)
+        parameters = payload.get("search_parameters", {})
+        engine, query = parameters.get("engine"), parameters.get("q")
+        if engine in ENGINES and query:
+            queries[query][engine] = payload.get("organic_results", [])
+    return dict(queries)
+
+
+def synthetic_queries(n, seed=0):
+    # Engines return overlapping pages in shuffled order, as they do live
+    rng = random.Random(seed)
+    queries = {}
+    for i in range(n):
+        query = " ".join(rng.sample(WORDS, 3))
+        pages = [
+            {
+                "link": f"https://www.site{rng.randint(0, 40)}.com/{rng.choice(WORDS)}/{j}",
+                "title": " ".join(rng.choice(WORDS) for _ in range(rng.randint(5, 10))).capitalize(),
+                "snippet": " ".join(rng.choice(WORDS) for _ in range(rng.randint(20, 35))).capitalize() + ".",
+            }
+            for j in range(20)
+        ]
+        all_results = {}
+        for engine in ENGINES:
+            picked = rng.sample(pages, 10)
+            all_results[engine] = [{**page, "position": k + 1} for k, page in enumerate(picked)]
+        queries[query] = all_results
+    return queries
+
+
+def overlap_at(a, b, k):
+    return len(set(a[:k]) & set(b[:k])) / k if a and b else 0.0
+
+
+def kendall_tau(a, b):
+    # Over the links both rankings kept
+    common = [link for link in a if link in set(b)]
+    if len(common) < 2:
+        return 1.0
+    rank_b = {link: i for i, link in enumerate(b)}
+    concordant = discordant = 0
+    for i in range(len(common)):
+        for j in range(i + 1, len(common)):
+            if rank_b[common[i]] < rank_b[common[j]]:
+                concordant += 1
+            else:
+                discordant += 1
+    return (concordant - discordant) / (concordant + discordant)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--payloads", help="Directory of recorded SerpAPI JSON responses")
+    parser.add_argument("--queries", type=int, default=50, help="Synthetic queries when no payloads are given")
+    parser.add_argument("--repeats", type=int, default=5)
+    parser.add_argument("--cold", action="store_true", help="Clear the in-memory embedding cache before every run")
+    args = parser.parse_args()
+
+    from app.api.v1.core.ranker import ranker
+    from app.api.v1.core.embedding_cache import embedding_cache
+    from app.api.v1.web_crawler.search import RANKING_STRATEGIES, process_and_rank_results
+
+    queries = recorded_queries(args.payloads) if args.payloads else synthetic_queries(args.queries)
+    if not queries:
+        raise SystemExit("No queries to rank")
+    ranker.load()
+    # Load the encoder before timing anything
+    process_and_rank_results(next(iter(queries.values())), next(iter(queries)), "embed")
+
+    timings = defaultdict(list)
+    rankings = defaultdict(dict)
+    for query, all_results in queries.items():
+        for strategy in RANKING_STRATEGIES:
+            for _ in range(args.repeats):
+                if args.cold:
+                    embedding_cache.memory.clear()
+                start = time.perf_counter()
+                ranked = process_and_rank_results(all_results, query, strategy)
+                timings[strategy].append(time.perf_counter() - start)
+            rankings[strategy][query] = [result.get("link", "") for result in ranked["organic_results"]]
+
+    print(f"{len(queries)} queries, {args.repeats} runs each{' (cold cache)' if args.cold else ''}\n")
+    print(f"{'strategy':>9} {'p50 ms':>9} {'p95 ms':>9} {'top1':>6} {'ovl@5':>6} {'ovl@10':>6} {'tau':>6}")
+    for strategy in RANKING_STRATEGIES:
+        ms = np.array(timings[strategy]) * 1000
+        reference = rankings["learned"]
+        candidate = rankings[strategy]
+        top1 = np.mean([candidate[q][:1] == reference[q][:1] for q in queries])
+        overlap5 = np.mean([overlap_at(candidate[q], reference[q], 5) for q in queries])
+        overlap10 = np.mean([overlap_at(candidate[q], reference[q], 10) for q in queries])
+        tau = np.mean([kendall_tau(candidate[q], reference[q]) for q in queries])
+        print(
+            f"{strategy:>9} {np.percentile(ms, 50):>9.2f} {np.percentile(ms, 95):>9.2f} "
+            f"{top1:>6.2f} {overlap5:>6.2f} {overlap10:>6.2f} {tau:>6.2f}"
+        )
+    print("\nAgreement columns compare each strategy's top 10 against learned.")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,67 @@
+import os
+import sys
+import multiprocessing
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.api.v1.core.embedding_cache import DiskEmbeddingStore, embedding_key
+
+DIM = 4
+
+
+def key(text):
+    return embedding_key("test-model", text)
+
+
+def vector_for(i):
+    return np.full(DIM, i, dtype=np.float32)
+
+
+def test_stores_sharing_a_directory_never_return_another_keys_vector(tmp_path):
+    a = DiskEmbeddingStore(str(tmp_path), capacity=4)
+    b = DiskEmbeddingStore(str(tmp_path), capacity=4)
+
+    b.put(key("y"), np.full(DIM, -1, dtype=np.float32))
+    # Used to land on the row b had just written, since a kept its own write position
+    a.put(key("x"), np.full(DIM, 7, dtype=np.float32))
+
+    assert b.get(key("y")).tolist() == [-1] * DIM
+    assert b.get(key("x")).tolist() == [7] * DIM
+    assert a.get(key("y")).tolist() == [-1] * DIM
+
+    # a wraps the ring; b must notice its rows were reused rather than serve them
+    for i in range(4):
+        a.put(key(f"z{i}"), vector_for(i))
+    assert b.get(key("y")) is None
+    assert b.get(key("x")) is None
+    assert b.get(key("z3")).tolist() == [3] * DIM
+
+
+def _write_keys(directory, worker, n):
+    store = DiskEmbeddingStore(directory, capacity=64)
+    for i in range(n):
+        store.put(key(f"{worker}-{i}"), vector_for(worker * 300 + i))
+    store.flush()
+
+
+def test_concurrent_writer_processes_keep_keys_and_vectors_paired(tmp_path):
+    directory = str(tmp_path)
+    context = multiprocessing.get_context("spawn")
+    workers = [context.Process(target=_write_keys, args=(directory, worker, 200)) for worker in (1, 2)]
+    for process in workers:
+        process.start()
+    for process in workers:
+        process.join()
+        assert process.exitcode == 0
+
+    store = DiskEmbeddingStore(directory)
+    assert store.written == 400
+    found = 0
+    for worker in (1, 2):
+        for i in range(200):
+            vector = store.get(key(f"{worker}-{i}"))
+            if vector is not None:
+                found += 1
+                assert vector.tolist() == vector_for(worker * 300 + i).tolist()
+    assert found == 64
@@ -0,0 +1,77 @@
+import os
+import sys
+import asyncio
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.api.v1.web_crawler import search
+from app.api.v1.core.rank_executor import RankExecutor, _init_process_worker
+
+QUERY = "home battery storage"
+PAGES = [
+    ("https://www.energy.gov/battery-storage", "Battery storage basics", "How home battery storage works with solar"),
+    ("https://example.com/home-battery-guide", "Home battery guide", "Choosing a home battery for storage and backup power"),
+    ("https://news.org/grid-storage-2024", "Grid storage grows", "Utilities add grid scale storage across the country"),
+    ("https://research.edu/lithium-cells", "Lithium cell research", "New lithium cell chemistry for longer lasting packs"),
+    ("https://startup.io/solar-kits", "Solar kits", "Rooftop solar kits with optional battery add-ons"),
+    ("https://site.ai/ev-charging", "EV charging at home", "Level 2 chargers and what they cost to install"),
+    ("https://longer-domain-name.net/backup", "Backup power options", "Generators compared with home battery storage systems"),
+]
+# Every engine returns the first page, at a different position; engines land one after another
+ENGINE_PAGES = {
+    "google": [0, 1, 2, 3],
+    "bing": [4, 0, 1, 5],
+    "duckduckgo": [6, 2, 0],
+}
+ENGINE_DELAYS = {"google": 0.0, "bing": 0.2, "duckduckgo": 0.4}
+
+
+async def fake_engine_results(engine, params):
+    await asyncio.sleep(ENGINE_DELAYS[engine])
+    results = [
+        {"position": position, "link": PAGES[page][0], "title": PAGES[page][1], "snippet": PAGES[page][2]}
+        for position, page in enumerate(ENGINE_PAGES[engine], 1)
+    ]
+    return {"engine": engine, "status": "ok", "hedged": False, "results": len(results)}, results
+
+
+def fake_similarities(query, results):
+    # Word overlap with the query stands in for the sentence encoder
+    words = set(query.lower().split())
+
+    def overlap(text):
+        return len(words & set(text.lower().split())) / len(words)
+
+    return (
+        np.array([overlap(result.get('snippet', '')) for result in results]),
+        np.array([overlap(result.get('title', '')) for result in results]),
+    )
+
+
+def _init_test_worker():
+    _init_process_worker()
+    search.compute_semantic_similarities = fake_similarities
+
+
+def rank_with(kind, monkeypatch):
+    executor = RankExecutor(kind, workers=2, initializer=_init_test_worker)
+    monkeypatch.setattr(search, "rank_executor", executor)
+    try:
+        return asyncio.run(search.search_and_rank(QUERY, "learned"))
+    finally:
+        executor.shutdown()
+
+
+def test_process_mode_ranks_like_thread_mode(monkeypatch):
+    monkeypatch.setattr(search, "fetch_engine_results", fake_engine_results)
+    monkeypatch.setattr(search, "compute_semantic_similarities", fake_similarities)
+    monkeypatch.setattr(search, "SEARCH_QUORUM", len(search.SEARCH_ENGINES))
+
+    thread = rank_with("thread", monkeypatch)["organic_results"]
+    process = rank_with("process", monkeypatch)["organic_results"]
+
+    assert [result["link"] for result in process] == [result["link"] for result in thread]
+    assert [result["positions"] for result in process] == [result["positions"] for result in thread]
+    shared = next(result for result in process if result["link"] == PAGES[0][0])
+    assert shared["positions"] == {"google": 1, "bing": 2, "duckduckgo": 3}